@@ -0,0 +1,50 @@
+from os import path
+from statistics import (
+	mean,
+	median,
+)
+from sys import path as import_path
+from time import perf_counter
+from typing import (
+	Any,
+	Callable,
+	Optional,
+)
+
+# the package imports its modules from src, as the tests do when run from there
+SOURCE = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'src')
+if SOURCE not in import_path:
+	import_path.insert(0, SOURCE)
+
+Case = Callable[[], Callable[[], Any]]
+Result = dict[str, float]
+registry: dict[str, Case] = {}
+
+
+def benchmark(name: str) -> Callable[[Case], Case]:
+	# a case does its setup and returns the operation to time
+	def register(case: Case) -> Case:
+		registry[name] = case
+		return case
+	return register
+
+
+def measure(operation: Callable[[], Any], seconds: float = 0.5, rounds: int = 5) -> Result:
+	times = []
+	deadline = perf_counter() + seconds
+	while len(times) < rounds or perf_counter() < deadline:
+		start = perf_counter()
+		operation()
+		times.append(perf_counter() - start)
+	return {
+		'rounds': len(times),
+		'min': min(times),
+		'median': median(times),
+		'mean': mean(times),
+		'max': max(times),
+		'ops': 1 / median(times) if median(times) else 0.0,
+	}
+
+
+def run(names: Optional[list[str]] = None, seconds: float = 0.5) -> dict[str, Result]:
+	return {name: measure(registry[name](), seconds) for name in names or registry}
@@ -0,0 +1,78 @@
+from argparse import ArgumentParser
+from json import (
+	dump,
+	load,
+)
+from platform import (
+	platform,
+	python_version,
+)
+from subprocess import (
+	DEVNULL,
+	PIPE,
+	run as run_process,
+)
+from sys import (
+	exit,
+	stderr,
+	stdout,
+)
+from time import time
+from typing import Optional
+
+import benchmarks.cases  # registers the cases
+from benchmarks import (
+	SOURCE,
+	registry,
+	run,
+)
+
+
+def commit() -> Optional[str]:
+	try:
+		result = run_process(['git', 'rev-parse', 'HEAD'], cwd=SOURCE, stdout=PIPE, stderr=DEVNULL, text=True)
+	except OSError:
+		return None
+	return result.stdout.strip() or None
+
+
+def compare(results: dict, baseline: dict):
+	# ratio of median times, so above 1 is slower than the baseline
+	for name, result in results.items():
+		before = baseline['results'].get(name)
+		if before is not None:
+			print(f'{name:32} {result["median"] / before["median"]:6.2f}x', file=stderr)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+	parser = ArgumentParser(prog='python -m benchmarks', description='Time the grid, rendering and solver hot paths')
+	parser.add_argument('filter', nargs='*', help='only run cases whose name contains one of these')
+	parser.add_argument('-o', '--output', default='-', help='JSON results (default: stdout)')
+	parser.add_argument('-s', '--seconds', type=float, default=0.5, help='minimum time spent on each case')
+	parser.add_argument('-c', '--compare', default=None, help='earlier JSON results to compare medians against')
+	args = parser.parse_args(argv)
+	names = [name for name in registry if not args.filter or any(f in name for f in args.filter)]
+	results = run(names, args.seconds)
+	for name, result in results.items():
+		print(f'{name:32} {result["median"] * 1e3:10.4f} ms {result["ops"]:12.1f}/s', file=stderr)
+	report = {
+		'commit': commit(),
+		'time': time(),
+		'python': python_version(),
+		'platform': platform(),
+		'results': results,
+	}
+	if args.compare is not None:
+		with open(args.compare) as stream:
+			compare(results, load(stream))
+	if args.output == '-':
+		dump(report, stdout, indent='\t')
+		stdout.write('\n')
+	else:
+		with open(args.output, 'w') as stream:
+			dump(report, stream, indent='\t')
+	return 0
+
+
+if __name__ == '__main__':
+	exit(main())
@@ -0,0 +1,174 @@
+from itertools import cycle
+from os import environ
+
+from numpy import (
+	flatnonzero,
+	random,
+)
+
+from benchmarks import benchmark
+from grid import Regioning
+from grid.constants import EMPTY
+from grid.affine import pattern
+from grid.solver import Solver
+from grid.sudoku import (
+	SudokuCell,
+	SudokuGrid,
+)
+
+SEED = 2020
+
+
+def puzzle(dimensions: int, box: int, givens: float, seed: int = SEED) -> SudokuGrid:
+	# a random subset of a solved pattern grid; from about 40% givens up 9^3 puzzles are unique and solve quickly
+	grid = SudokuGrid(dimensions, Regioning(shape=(box, box)))
+	keep = random.default_rng(seed).random(grid.count) < givens
+	grid.values[keep] = pattern(dimensions, box).ravel()[keep]
+	grid.given[:] = keep
+	return grid
+
+
+def game(dimensions: int = 3):
+	environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+	from pygame import init
+	from game import Game
+	from rendering import Rendering
+	init()
+	game = Game(SudokuGrid(dimensions, Regioning(False, (3, 3))), Rendering(50, 'monospaced', 3))
+	game.renderer.tick()
+	return game
+
+
+def construct(dimensions: int, box: int):
+	return lambda: SudokuGrid(dimensions, Regioning(shape=(box, box)))
+
+
+benchmark('construct 4^3')(lambda: construct(3, 2))
+benchmark('construct 9^3')(lambda: construct(3, 3))
+benchmark('construct 9^4')(lambda: construct(4, 3))
+
+
+@benchmark('set_view 9^4')
+def set_view():
+	renderer = game(4).renderer
+	views = cycle(f'{a},{b},*,*' for a in range(9) for b in range(9))
+	return lambda: renderer.set_view(next(views))
+
+
+@benchmark('view move 9^4')
+def view_move():
+	view = game(4).renderer.view
+	return lambda: view.move(0)
+
+
+@benchmark('selected 9^3')
+def selected():
+	renderer = game().renderer
+	renderer.selection.mask[0, :, 4] = True
+	return lambda: renderer.selected
+
+
+@benchmark('render full 9^3')
+def render_full():
+	game_ = game()
+	game_.grid.values[:] = puzzle(3, 3, 0.5).values
+	plane = game_.renderer.plane
+
+	def render():
+		plane.mark_all()
+		plane.render()
+	return render
+
+
+@benchmark('render incremental 9^3')
+def render_incremental():
+	game_ = game()
+	renderer = game_.renderer
+	cells = cycle(range(81))
+
+	def render():
+		renderer.grid.cell(next(cells)).candidates ^= 2
+		renderer.tick()
+	return render
+
+
+@benchmark('render_text cached')
+def render_text_cached():
+	game()
+	from rendering import Colors
+	from rendering.graphics import render_text
+	digits = cycle('123456789')
+	return lambda: render_text('monospaced', next(digits), 50, Colors.BLACK)
+
+
+@benchmark('render_text uncached')
+def render_text_uncached():
+	game()
+	from rendering import Colors
+	from rendering.graphics import (
+		load_font,
+		render_glyph,
+		render_text,
+	)
+
+	def render():
+		load_font.cache_clear()
+		render_glyph.cache_clear()
+		render_text('monospaced', '5', 50, Colors.BLACK)
+	return render
+
+
+@benchmark('toggle candidate 9^4')
+def toggle_candidate():
+	grid = puzzle(4, 3, 0.3)
+	where = grid.values == EMPTY
+	return lambda: grid.toggle(5, SudokuCell.Field.CANDIDATE, where)
+
+
+@benchmark('fill_candidates 9^3')
+def fill_candidates_3():
+	grid = puzzle(3, 3, 0.3)
+	return grid.fill_candidates
+
+
+@benchmark('fill_candidates 9^4')
+def fill_candidates_4():
+	grid = puzzle(4, 3, 0.3)
+	return grid.fill_candidates
+
+
+@benchmark('solve 9^3')
+def solve():
+	grids = cycle([puzzle(3, 3, 0.4, seed) for seed in range(20)])
+	return lambda: Solver(next(grids), givens_only=True).count(2)
+
+
+@benchmark('solve sparse 9^3')
+def solve_sparse():
+	# about 36 givens: far from unique, and where plain search used to stall
+	grids = cycle([puzzle(3, 3, 0.05, seed) for seed in range(5)])
+	return lambda: Solver(next(grids), givens_only=True).solve()
+
+
+@benchmark('uniqueness check 9^3')
+def uniqueness():
+	# a given added and removed again per round, each followed by SudokuGrid.count_solutions: the kept solver
+	# extends its propagated state for the addition and reloads for the removal
+	grid = puzzle(3, 3, 0.4)
+	solution = pattern(3, 3).ravel()
+	cells = cycle(flatnonzero(~grid.given).tolist())
+	grid.count_solutions()
+
+	def change():
+		index = next(cells)
+		grid.values[index], grid.given[index] = solution[index], True
+		grid.count_solutions()
+		grid.values[index], grid.given[index] = EMPTY, False
+		grid.count_solutions()
+	return change
+
+
+@benchmark('solver init 9^4')
+def solver_init():
+	grid = puzzle(4, 3, 0.4)
+	return lambda: Solver(grid, givens_only=True)
@@ -0,0 +1,128 @@
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from json import (
+	dumps,
+	loads,
+)
+from sys import (
+	exit,
+	stderr,
+	stdin,
+	stdout,
+)
+from time import perf_counter
+from typing import (
+	Any,
+	Iterator,
+	Optional,
+	TextIO,
+)
+
+from grid.solver import (
+	Budget,
+	Solver,
+)
+from grid.storage import (
+	from_json,
+	from_text,
+	to_text,
+)
+from grid.sudoku import SudokuGrid
+
+Result = dict[str, Any]
+
+
+def read_puzzles(stream: TextIO) -> Iterator[tuple[int, str]]:
+	for number, line in enumerate(stream, 1):
+		line = line.strip()
+		if line and not line.startswith('#'):
+			yield number, line
+
+
+def parse_puzzle(line: str) -> SudokuGrid:
+	return from_json(loads(line)) if line.startswith('{') else from_text(line)
+
+
+def grade(solver: Solver) -> str:
+	return 'propagation' if solver.nodes == 0 else 'search'
+
+
+def solve_puzzle(number: int, line: str, limit: int = 2, seconds: Optional[float] = None) -> Result:
+	start = perf_counter()
+	try:
+		grid = parse_puzzle(line)
+	except (KeyError, TypeError, ValueError) as error:
+		return {'line': number, 'error': str(error)}
+	solver = Solver(grid, givens_only=True)
+	budget = Budget(seconds=seconds)
+	solutions = 0
+	for candidates in solver.solutions(budget):
+		if solutions == 0:
+			solver.apply(candidates)
+		solutions += 1
+		if solutions >= limit:
+			break
+	return {
+		'line': number,
+		'valid': solver.consistent,
+		'solutions': solutions,
+		# one solution only settles uniqueness if the count was allowed to find a second
+		'unique': solutions == 1 and not budget.exhausted if limit >= 2 else None,
+		'grade': grade(solver) if solver.consistent and solutions else None,
+		'nodes': solver.nodes,
+		'seconds': round(perf_counter() - start, 6),
+		'timed_out': budget.exhausted,
+		'solution': to_text(grid) if solutions else None,
+	}
+
+
+def solve_all(
+		puzzles: Iterator[tuple[int, str]],
+		workers: int = 0,
+		limit: int = 2,
+		seconds: Optional[float] = None,
+) -> Iterator[Result]:
+	# results come back in input order with at most a few puzzles per worker in flight
+	if workers <= 1:
+		for number, line in puzzles:
+			yield solve_puzzle(number, line, limit, seconds)
+		return
+	with ProcessPoolExecutor(workers) as executor:
+		pending = deque()
+		for number, line in puzzles:
+			pending.append(executor.submit(solve_puzzle, number, line, limit, seconds))
+			if len(pending) >= 4 * workers:
+				yield pending.popleft().result()
+		while pending:
+			yield pending.popleft().result()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+	parser = ArgumentParser(description='Solve, grade and validate puzzles without the user interface')
+	parser.add_argument('input', nargs='?', default='-', help='one puzzle per line, text or JSON (default: stdin)')
+	parser.add_argument('-o', '--output', default='-', help='JSON lines of results (default: stdout)')
+	parser.add_argument('-w', '--workers', type=int, default=0, help='worker processes; 0 solves in this process')
+	parser.add_argument('-l', '--limit', type=int, default=2, help='stop counting solutions at this many')
+	parser.add_argument('-t', '--timeout', type=float, default=None, help='seconds allowed per puzzle')
+	args = parser.parse_args(argv)
+	source = stdin if args.input == '-' else open(args.input)
+	target = stdout if args.output == '-' else open(args.output, 'w')
+	count = 0
+	start = perf_counter()
+	try:
+		for result in solve_all(read_puzzles(source), args.workers, args.limit, args.timeout):
+			target.write(dumps(result) + '\n')
+			count += 1
+	finally:
+		if source is not stdin:
+			source.close()
+		if target is not stdout:
+			target.close()
+	elapsed = perf_counter() - start
+	print(f'{count} puzzles in {elapsed:.3f}s ({count / elapsed if elapsed else 0:.1f} puzzles/s)', file=stderr)
+	return 0
+
+
+if __name__ == '__main__':
+	exit(main())
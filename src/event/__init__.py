@@ -1,10 +1,24 @@
+from collections import defaultdict
 from functools import wraps
-from typing import Callable
+from typing import (
+	Callable,
+	Optional,
+)
 
+from pygame import (
+	MOUSEBUTTONDOWN,
+	MOUSEBUTTONUP,
+	MOUSEMOTION,
+	Rect,
+)
 from pygame.event import Event
 
 from util.decorator import decorator_with_args
 
+BUCKET = 64
+POSITIONAL = frozenset([MOUSEBUTTONDOWN, MOUSEBUTTONUP, MOUSEMOTION])
+tables: dict[type, dict[int, Callable]] = {}
+
 
 @decorator_with_args
 def event_handler(callback: Callable, event_type: int):
@@ -21,11 +35,82 @@ class EventHandler:
 		self.handlers = self.get_handlers(self.__class__)
 
 	@staticmethod
-	def get_handlers(cls):
-		return {h.type: h for h in cls.__dict__.values() if hasattr(h, 'decorators') and event_handler in h.decorators}
+	def get_handlers(cls) -> dict[int, Callable]:
+		# built once per class; subclasses inherit handlers they do not override
+		handlers = tables.get(cls)
+		if handlers is None:
+			handlers = {}
+			for klass in reversed(cls.__mro__):
+				for h in klass.__dict__.values():
+					if hasattr(h, 'decorators') and event_handler in h.decorators:
+						handlers[h.type] = h
+			tables[cls] = handlers
+		return handlers
 
 	def handle(self, event: Event):
 		handlers = self.handlers
 		if event.type in handlers:
 			handler = handlers[event.type]
 			handler(self, event)
+
+
+class Dispatcher:
+	# global handlers get every event of their types; placed handlers get mouse events only under the cursor,
+	# so a mouse event costs the handlers in its bucket, however many elements there are
+
+	def __init__(self):
+		self.buckets = defaultdict(list)
+		self.focused: Optional[EventHandler] = None
+		self.places = {}
+		self.table = defaultdict(list)
+		self.spatial = defaultdict(dict)
+
+	@staticmethod
+	def covered(rect: Rect) -> list[tuple[int, int]]:
+		return [
+			(x, y)
+			for x in range(rect.left // BUCKET, (rect.right - 1) // BUCKET + 1)
+			for y in range(rect.top // BUCKET, (rect.bottom - 1) // BUCKET + 1)
+		]
+
+	def add(self, handler: EventHandler, rect: Optional[Rect] = None):
+		for event_type, callback in handler.handlers.items():
+			if rect is not None and event_type in POSITIONAL:
+				self.spatial[handler][event_type] = callback
+			else:
+				self.table[event_type].append((handler, callback))
+		if rect is not None:
+			self.place(handler, rect)
+
+	def at(self, pos: tuple[int, int]) -> list[EventHandler]:
+		bucket = self.buckets.get((pos[0] // BUCKET, pos[1] // BUCKET), [])
+		return [handler for handler in bucket if self.places[handler].collidepoint(pos)]
+
+	def dispatch(self, event: Event):
+		for handler, callback in self.table.get(event.type, []):
+			callback(handler, event)
+		if event.type not in POSITIONAL:
+			return
+		hit = self.at(event.pos)
+		for handler in hit:
+			callback = self.spatial[handler].get(event.type)
+			if callback is not None:
+				callback(handler, event)
+		if event.type == MOUSEBUTTONDOWN:
+			# only the element clicked last can hold focus, so a click elsewhere blurs that one alone
+			if self.focused is not None and self.focused not in hit:
+				self.focused.blur(event)
+				self.focused = None
+			for handler in hit:
+				if hasattr(handler, 'blur'):
+					self.focused = handler
+
+	def place(self, handler: EventHandler, rect: Rect):
+		# call again whenever the handler's rect moves or resizes
+		previous = self.places.get(handler)
+		if previous is not None:
+			for key in self.covered(previous):
+				self.buckets[key].remove(handler)
+		self.places[handler] = Rect(rect)
+		for key in self.covered(rect):
+			self.buckets[key].append(handler)
@@ -1,27 +1,44 @@
-from asyncio import run
+from asyncio import (
+	run,
+	sleep,
+)
+from sys import stderr
+from time import perf_counter
+from typing import Optional
 
 from pygame import (
 	KEYDOWN,
 	KMOD_CTRL,
 	KMOD_SHIFT,
 	K_DELETE,
+	K_F3,
+	K_F4,
+	K_a,
+	K_f,
+	K_y,
+	K_z,
 	MOUSEBUTTONDOWN,
 	MOUSEBUTTONUP,
 	MOUSEMOTION,
+	NOEVENT,
 	QUIT,
+	VIDEORESIZE,
+	WINDOWEXPOSED,
 	event as events,
 	init as init_game,
 	quit as quit_game,
 )
 from pygame.event import Event
 from pygame.key import get_mods as get_mod_keys
-from pygame.time import Clock
 
 from event import (
+	Dispatcher,
 	EventHandler,
 	event_handler,
 )
 from grid import Regioning
+from grid.constants import DIGITS
+from grid.journal import Journal
 from grid.render import GridRenderer
 from grid.sudoku import SudokuGrid
 from keys import (
@@ -30,8 +47,11 @@ from keys import (
 )
 from rendering import Rendering
 from rendering.renderer import Renderer
+from util.instrument import instruments
 from util.tuple import formula
 
+IDLE_TIMEOUT = 50
+
 
 class Mouse(EventHandler):
 
@@ -68,9 +88,11 @@ class Mouse(EventHandler):
 		self.pos = event.pos
 
 	@event_handler(MOUSEBUTTONDOWN)
-	def rise(self, _=None):
+	def rise(self, event: Optional[Event] = None):
 		self.down = True
 		self.edge = True
+		if event is not None:
+			self.pos = event.pos
 
 	def reset(self):
 		self.edge = False
@@ -84,12 +106,21 @@ class Game(EventHandler):
 			rendering: Rendering,
 	):
 		super().__init__()
-		self.clock = Clock()
+		self.dispatcher = Dispatcher()
 		self.fps = 30
 		self.grid = grid
+		self.journal = Journal(grid)
 		self.mouse = Mouse()
 		self.renderer = Renderer(self, self.grid, rendering)
 		self.running = True
+		self.dispatcher.add(self)
+		self.dispatcher.add(self.mouse)
+		for element in self.renderer.elements:
+			self.dispatcher.add(element, element.rect)
+
+	@event_handler(WINDOWEXPOSED)
+	def exposed(self, _: Event):
+		self.renderer.repaint()
 
 	@event_handler(KEYDOWN)
 	def key_press(self, event: Event):
@@ -97,12 +128,46 @@ class Game(EventHandler):
 			self.enter_digit(event)
 		elif event.key == K_DELETE:
 			self.clear_cells()
+		elif event.key == K_z and get_mod_keys() & KMOD_CTRL:
+			self.redo() if get_mod_keys() & KMOD_SHIFT else self.undo()
+		elif event.key == K_y and get_mod_keys() & KMOD_CTRL:
+			self.redo()
+		elif event.key == K_F3:
+			instruments.toggle()
+		elif event.key == K_F4:
+			self.toggle_profile()
 		elif event.key in mode_keys:
 			self.renderer.set_mode(key=event.key)
+		elif event.key == K_a and get_mod_keys() & KMOD_CTRL:
+			self.renderer.selection.add(self.renderer.view.cells)
+		elif event.key == K_f and get_mod_keys() & KMOD_CTRL:
+			self.fill_candidates()
+
+	@event_handler(VIDEORESIZE)
+	def resized(self, _: Event):
+		self.renderer.repaint()
+
+	def redo(self):
+		self.journal.redo()
+
+	def undo(self):
+		self.journal.undo()
+
+	def toggle_profile(self):
+		# F4 starts cProfile and tracing; pressing it again writes both files
+		if instruments.profiling:
+			for file in instruments.stop_profile():
+				print(f'wrote {file}', file=stderr)
+		else:
+			instruments.enabled = True
+			instruments.start_profile()
+
+	def fill_candidates(self):
+		selection = self.renderer.selection
+		self.grid.fill_candidates(selection.flat if selection.count else None)
 
 	def clear_cells(self):
-		for cell in self.renderer.selected:
-			cell.clear()
+		self.grid.clear(self.renderer.selection.flat)
 
 	def select_cell(self):
 		pos = self.mouse.pos
@@ -126,27 +191,39 @@ class Game(EventHandler):
 		self.mouse.reset()
 
 	def enter_digit(self, event: Event):
-		digit = number_keys.index(event.key) % 10
-		mode = self.renderer.mode
-		for cell in self.renderer.selected:
-			cell.toggle(digit, mode)
-
-	def mainloop(self):
-		event = events.poll()
-		if event.type == QUIT:
-			self.running = False
+		digit = number_keys.index(event.key) % DIGITS
+		if digit > self.grid.size:
 			return
-		self.handle(event)
-		self.mouse.handle(event)
-		for element in self.renderer.elements:
-			element.handle(event)
+		self.grid.toggle(digit, self.renderer.mode, self.renderer.selection.flat)
+
+	def dispatch(self, event: Event):
+		self.dispatcher.dispatch(event)
 		if self.mouse.down:
 			self.select_cell()
 		if self.mouse.falling:
 			self.renderer.plane.clear(GridRenderer.Clearable.INTERACTIONS)
-		self.clock.tick()
-		if self.clock.get_fps() >= self.fps:
+
+	def mainloop(self, timeout: int = IDLE_TIMEOUT) -> float:
+		# drain every pending event and draw if anything changed; returns the seconds to sleep before the next
+		# pass: the rest of the frame after drawing, so frames stay at fps, or `timeout` ms while idle
+		with instruments.span('events'):
+			for event in events.get():
+				if event.type == QUIT:
+					self.running = False
+					return 0
+				if event.type != NOEVENT:
+					self.dispatch(event)
+		if not self.renderer.dirty:
+			return timeout / 1000
+		start = perf_counter()
+		with instruments.span('frame'):
 			self.renderer.tick()
+		return max(0.0, 1 / self.fps - (perf_counter() - start))
+
+	async def run(self, timeout: int = IDLE_TIMEOUT):
+		# never blocks in pygame: the waits are asyncio sleeps, so other tasks on the event loop keep running
+		while self.running:
+			await sleep(self.mainloop(timeout))
 
 
 async def main():
@@ -155,8 +232,10 @@ async def main():
 	rendering = Rendering(50, 'monospaced', 3)
 	grid = SudokuGrid(3, regioning)
 	game = Game(grid, rendering)
-	while game.running:
-		game.mainloop()
+	await game.run()
+	game.renderer.plane.scheduler.shutdown()
+	if instruments.profiling:
+		game.toggle_profile()
 	quit_game()
 
 
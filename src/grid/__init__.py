@@ -7,21 +7,29 @@ from typing import (
 )
 
 from numpy import (
+	arange,
+	asarray,
 	empty,
+	int32,
 	ndarray,
 	ndenumerate,
+	ndindex,
 	nditer,
+	prod,
 )
 
 from grid.constants import (
 	INIT_EMPTY,
 	POPULATE,
 )
-from rendering import Size
-from util.tuple import formula
+from util.tuple import (
+	Size,
+	formula,
+)
 
 Coordinates = tuple[int, ...]
 Flags = Optional[Iterable[str]]
+Shape = tuple[int, ...]
 
 
 class Regioning:
@@ -44,10 +52,33 @@ class Regioning:
 
 
 class Cell:
+	__slots__ = ('grid',)
 
 	def __init__(self, grid: ForwardRef('Grid')):
 		self.grid = grid
 
+	@property
+	def key(self):
+		return self
+
+
+class CellArray(ndarray):
+	# flat cell indices which dereference to lightweight cell views of the owning grid
+
+	def __new__(cls, grid: ForwardRef('Grid'), shape: Shape):
+		array = arange(prod(shape), dtype=int32).reshape(shape).view(cls)
+		array.grid = grid
+		return array
+
+	def __array_finalize__(self, array):
+		self.grid = getattr(array, 'grid', None)
+
+	def __getitem__(self, key):
+		item = super().__getitem__(key)
+		if isinstance(item, ndarray):
+			return item
+		return self.grid.cell(int(item))
+
 
 class Grid:
 
@@ -61,6 +92,7 @@ class Grid:
 	):
 		if flags is None:
 			flags = []
+		self.lookup = {}
 		self.cells = cells
 		if type(regioning) is not int:
 			self.regioning = regioning
@@ -71,8 +103,16 @@ class Grid:
 			POPULATE in flags,
 		]):
 			size = regioning if type(regioning) is int else (shape := regioning.shape)[0] * shape[1]
-			self.cells = empty([size] * dimensions, cell_type)
-			self.populate(cell_type)
+			self.populate(cell_type, (size,) * dimensions)
+
+	@property
+	def cells(self) -> Optional[ndarray]:
+		return self._cells
+
+	@cells.setter
+	def cells(self, cells: Optional[ndarray]):
+		self._cells = cells
+		self.reindex()
 
 	@property
 	def dimensions(self) -> int:
@@ -82,15 +122,19 @@ class Grid:
 	def enumerator(self) -> ndenumerate:
 		return ndenumerate(self.cells)
 
+	@property
+	def shape(self) -> Shape:
+		return self.cells.shape
+
 	@property
 	def size(self) -> int:
 		return self.cells.shape[0]
 
 	def get_coordinates(self, target: Cell) -> Coordinates:
-		for coordinates, cell in self.enumerator:
-			if cell == target:
-				return coordinates
-		raise KeyError('target cell is not in grid')
+		try:
+			return self.lookup[target.key]
+		except KeyError:
+			raise KeyError('target cell is not in grid') from None
 
 	def iterator(self, flags: Flags = None, op_flags: Flags = None) -> nditer:
 		if flags is None:
@@ -99,6 +143,14 @@ class Grid:
 			op_flags = ['readonly']
 		return nditer(self.cells, flags=flags, op_flags=op_flags)
 
-	def populate(self, cell_type: Callable):
-		for cell in self.iterator(op_flags=['writeonly']):
+	def populate(self, cell_type: Callable, shape: Shape):
+		cells = empty(shape, cell_type)
+		for cell in nditer(cells, flags=['refs_ok'], op_flags=['writeonly']):
 			cell[...] = cell_type(self)
+		self.cells = cells
+
+	def reindex(self):
+		if self.cells is None:
+			self.lookup = {}
+		else:
+			self.lookup = dict(zip(asarray(self.cells).ravel().tolist(), ndindex(self.shape)))
@@ -0,0 +1,206 @@
+from itertools import permutations
+from typing import (
+	ForwardRef,
+	Optional,
+)
+
+from numpy import (
+	argwhere,
+	array,
+	indices,
+	int8,
+	ndarray,
+)
+
+from grid.constants import EMPTY
+
+Line = tuple[int, int]
+
+
+def is_prime(n: int) -> bool:
+	return n > 1 and all(n % d for d in range(2, int(n ** 0.5) + 1))
+
+
+def lines(box: int) -> list[Line]:
+	# the b + 1 lines through the origin of Z_b x Z_b
+	return [(0, 1)] + [(1, t) for t in range(box)]
+
+
+def pattern(dimensions: int, box: int) -> Optional[ndarray]:
+	# each digit is a linear map of the coordinates, split into (band, row in band), over Z_b x Z_b;
+	# every pair of axes gets its own line through the origin, so that works for up to b + 1 dimensions
+	if not is_prime(box) or dimensions > box + 1:
+		return None
+	lows = lines(box)
+	highs = [(1, 0)] + [(0, 1)] * box
+	coordinates = indices((box * box,) * dimensions)
+	digit = [
+		sum(highs[k][i] * (coordinates[k] // box) + lows[k][i] * (coordinates[k] % box) for k in range(dimensions)) % box
+		for i in range(2)
+	]
+	return (digit[0] * box + digit[1] + 1).astype(int8)
+
+
+class AffineCompletion:
+	# completes givens to digit = label(f_0(x_0) + ... + f_d(x_d)) over Z_b x Z_b, where each f_k takes the bands
+	# of its axis onto the cosets of its own line; pattern() relabelled and shuffled is always of that form.
+	# Sparse grids with such a solution are hard for plain search, while here every given pins a sum.
+	# Points of Z_b x Z_b are numbered p * b + q.
+
+	def __init__(self, values: ndarray, box: int):
+		self.box = box
+		self.size = size = box * box
+		self.values = values
+		self.dimensions = values.ndim
+		self.givens = [
+			(tuple(cell), int(values[tuple(cell)])) for cell in argwhere(values != EMPTY).tolist()
+		]
+		self.plus = [[((u // box + v // box) % box) * box + (u + v) % box for v in range(size)] for u in range(size)]
+		self.touching = {}
+		for number, (cell, _) in enumerate(self.givens):
+			for axis, x in enumerate(cell):
+				self.touching.setdefault((axis, x), []).append(number)
+		self.order = None
+		self.budget = None
+		self.nodes = 0
+
+	@staticmethod
+	def applicable(dimensions: int, box: tuple[int, int]) -> bool:
+		rows, columns = box
+		return rows == columns and is_prime(rows) and 2 <= dimensions <= rows + 1
+
+	def ordering(self) -> list[tuple[int, int]]:
+		# the coordinate that completes the most givens goes next, so sums are checked as early as possible
+		missing = [self.dimensions] * len(self.givens)
+		left = set(self.touching)
+		order = []
+		while left:
+			chosen = max(left, key=lambda variable: (
+				sum(missing[number] == 1 for number in self.touching[variable]),
+				len(self.touching[variable]),
+				variable,
+			))
+			for number in self.touching[chosen]:
+				missing[number] -= 1
+			left.remove(chosen)
+			order.append(chosen)
+		return order
+
+	def reset(self, chosen: list[Line]):
+		box, size = self.box, self.size
+		# the coset of a point is named after its smallest member
+		self.cosets = [
+			[min(((p // box + s * high) % box) * box + (p + s * low) % box for s in range(box)) for p in range(size)]
+			for high, low in chosen
+		]
+		self.maps = [[-1] * size for _ in range(self.dimensions)]
+		self.placed = [0] * self.dimensions
+		self.taken = [[False] * size for _ in range(self.dimensions)]
+		self.bands = [[-1] * box for _ in range(self.dimensions)]
+		self.covered = [[False] * size for _ in range(self.dimensions)]
+		self.labels = {}
+		self.points = [0] * size
+		self.missing = [self.dimensions] * len(self.givens)
+
+	def place(self, axis: int, x: int, labelled: list[int]) -> bool:
+		# false if a given completed here contradicts the others; digits labelled on the way go in `labelled`
+		plus = self.plus
+		completed = []
+		for number in self.touching[(axis, x)]:
+			self.missing[number] -= 1
+			if not self.missing[number]:
+				completed.append(number)
+		for number in completed:
+			cell, digit = self.givens[number]
+			total = 0
+			for k, coordinate in enumerate(cell):
+				total = plus[total][self.maps[k][coordinate]]
+			label = self.labels.get(digit)
+			if label is None:
+				if self.points[total]:
+					return False
+				self.labels[digit] = total
+				self.points[total] = digit
+				labelled.append(digit)
+			elif label != total:
+				return False
+		return True
+
+	def unplace(self, axis: int, x: int, labelled: list[int]):
+		for number in self.touching[(axis, x)]:
+			self.missing[number] += 1
+		for digit in labelled:
+			self.points[self.labels.pop(digit)] = 0
+
+	def search(self, position: int) -> bool:
+		if position == len(self.order):
+			return True
+		self.nodes += 1
+		if self.budget.spent(self.nodes):
+			return False
+		axis, x = self.order[position]
+		band = x // self.box
+		known = self.bands[axis][band]
+		maps, taken, covered, cosets = self.maps[axis], self.taken[axis], self.covered[axis], self.cosets[axis]
+		# the labels absorb a translation of any f_k, so the first coordinate placed on an axis goes to the origin
+		for point in range(self.size if self.placed[axis] else 1):
+			coset = cosets[point]
+			if taken[point] or (coset != known if known >= 0 else covered[coset]):
+				continue
+			maps[x] = point
+			taken[point] = True
+			self.placed[axis] += 1
+			if known < 0:
+				self.bands[axis][band] = coset
+				covered[coset] = True
+			labelled = []
+			if self.place(axis, x, labelled) and self.search(position + 1):
+				return True
+			self.unplace(axis, x, labelled)
+			if known < 0:
+				self.bands[axis][band] = -1
+				covered[coset] = False
+			taken[point] = False
+			self.placed[axis] -= 1
+			maps[x] = -1
+			if self.budget.exhausted:
+				break
+		return False
+
+	def fill(self) -> ndarray:
+		# coordinates and digits no given mentions take whatever is left
+		box, size = self.box, self.size
+		for axis in range(self.dimensions):
+			maps, taken, covered, cosets = self.maps[axis], self.taken[axis], self.covered[axis], self.cosets[axis]
+			for band in range(box):
+				if self.bands[axis][band] < 0:
+					self.bands[axis][band] = coset = next(c for c in range(size) if cosets[c] == c and not covered[c])
+					covered[coset] = True
+				free = [p for p in range(size) if cosets[p] == self.bands[axis][band] and not taken[p]]
+				for x in range(band * box, band * box + box):
+					if maps[x] < 0:
+						maps[x] = free.pop()
+						taken[maps[x]] = True
+		free = [p for p in range(size) if not self.points[p]]
+		for digit in range(1, size + 1):
+			if digit not in self.labels:
+				self.points[free.pop()] = digit
+		coordinates = indices(self.values.shape)
+		high = sum(array([p // box for p in self.maps[k]])[coordinates[k]] for k in range(self.dimensions)) % box
+		low = sum(array([p % box for p in self.maps[k]])[coordinates[k]] for k in range(self.dimensions)) % box
+		return array(self.points, dtype=int8)[high * box + low]
+
+	def complete(self, budget: ForwardRef('Budget')) -> Optional[ndarray]:
+		# any two distinct lines can be moved onto the first two, and the labels absorb that move
+		if self.order is None:
+			self.order = self.ordering()
+		self.budget = budget
+		self.nodes = 0
+		first, second, *rest = lines(self.box)
+		for chosen in permutations(rest, self.dimensions - 2):
+			self.reset([first, second, *chosen])
+			if self.search(0):
+				return self.fill()
+			if budget.exhausted:
+				break
+		return None
@@ -1,2 +1,8 @@
 INIT_EMPTY = 'empty'
 POPULATE = 'populate'
+
+# digits that can be typed, 0 to 9; keys.number_keys has a main row and a keypad key for each
+DIGITS = 10
+EMPTY = -1
+NO_REGION = -1
+UNIT_CACHE = 'HDPP_UNIT_CACHE'
@@ -0,0 +1,242 @@
+from functools import partial
+from typing import (
+	Callable,
+	Iterator,
+	Optional,
+)
+
+from numpy import (
+	full,
+	int8,
+	where,
+)
+
+from grid.affine import AffineCompletion
+from grid.constants import EMPTY
+from grid.solver import (
+	Budget,
+	Strategy,
+	restarts,
+)
+from grid.sudoku import SudokuGrid
+from grid.units import regioning_index
+
+Rows = list[int]
+
+
+class ExactCover:
+	# Algorithm X over the rows (cell, digit); columns are "cell has a digit" and "unit has digit d".
+	# Dancing links kept in flat lists: node 0 is the root, nodes 1 to C head the columns, then the rows' nodes
+	# follow each other, so a row is a run of consecutive nodes.
+
+	def __init__(self, grid: SudokuGrid, givens_only: bool = False):
+		self.grid = grid
+		self.size = size = grid.size
+		self.nodes = 0
+		index = regioning_index(grid.dimensions, grid.regioning)
+		units, cell_units, _ = index.lists
+		count = grid.count
+		self.rows = [
+			[cell] + [count + unit * size + digit for unit in cell_units[cell]]
+			for cell in range(count)
+			for digit in range(size)
+		]
+		self.columns = [[] for _ in range(count + len(units) * size)]
+		for row, columns in enumerate(self.rows):
+			for column in columns:
+				self.columns[column].append(row)
+		self.link()
+		self.givens = []
+		self.consistent = self.load(givens_only)
+
+	def link(self):
+		headers = len(self.columns)
+		total = 1 + headers + sum(len(columns) for columns in self.rows)
+		self.left = left = list(range(-1, total - 1))
+		self.right = right = list(range(1, total + 1))
+		self.up = up = list(range(total))
+		self.down = down = list(range(total))
+		self.header = header = list(range(total))
+		self.counts = [0] * (headers + 1)
+		self.owner = [-1] * total
+		self.starts = []
+		left[0], right[headers] = headers, 0
+		node = headers + 1
+		for row, columns in enumerate(self.rows):
+			self.starts.append(node)
+			for offset, column in enumerate(columns):
+				top = column + 1
+				left[node] = node - 1 if offset else node + len(columns) - 1
+				right[node] = node + 1 if offset < len(columns) - 1 else node - offset
+				header[node] = top
+				self.owner[node] = row
+				up[node], down[node] = up[top], top
+				down[up[top]] = node
+				up[top] = node
+				self.counts[top] += 1
+				node += 1
+
+	def load(self, givens_only: bool) -> bool:
+		filled = self.grid.values >= 0
+		if givens_only:
+			filled &= self.grid.given
+		for cell in where(filled)[0].tolist():
+			digit = int(self.grid.values[cell]) - 1
+			if not 0 <= digit < self.size:
+				return False
+			row = cell * self.size + digit
+			# a column a previous given already covered is no longer on the header list
+			if any(self.right[self.left[column + 1]] != column + 1 for column in self.rows[row]):
+				return False
+			self.select(row)
+			self.givens.append(row)
+		return True
+
+	def cover(self, top: int):
+		left, right, up, down, header, counts = self.left, self.right, self.up, self.down, self.header, self.counts
+		right[left[top]] = right[top]
+		left[right[top]] = left[top]
+		node = down[top]
+		while node != top:
+			other = right[node]
+			while other != node:
+				up[down[other]] = up[other]
+				down[up[other]] = down[other]
+				counts[header[other]] -= 1
+				other = right[other]
+			node = down[node]
+
+	def uncover(self, top: int):
+		left, right, up, down, header, counts = self.left, self.right, self.up, self.down, self.header, self.counts
+		node = up[top]
+		while node != top:
+			other = left[node]
+			while other != node:
+				counts[header[other]] += 1
+				up[down[other]] = other
+				down[up[other]] = other
+				other = left[other]
+			node = up[node]
+		right[left[top]] = top
+		left[right[top]] = top
+
+	def select(self, row: int):
+		start = self.starts[row]
+		for node in range(start, start + len(self.rows[row])):
+			self.cover(self.header[node])
+
+	def deselect(self, row: int):
+		start = self.starts[row]
+		for node in range(start + len(self.rows[row]) - 1, start - 1, -1):
+			self.uncover(self.header[node])
+
+	def solutions(
+			self,
+			budget: Optional[Budget] = None,
+			choose: Optional[Callable[[], int]] = None,
+	) -> Iterator[Rows]:
+		if not self.consistent:
+			return
+		self.nodes = 0
+		choose = choose or self.choose
+		down, owner, right = self.down, self.owner, self.right
+		chosen = []
+		# one frame per chosen column: its header and the node of the row being tried
+		frames = []
+		try:
+			while True:
+				if right[0] == 0:
+					yield self.givens + chosen
+				else:
+					top = choose()
+					frames.append([top, top])
+				while frames:
+					frame = frames[-1]
+					top, node = frame
+					if node != top:
+						self.deselect(chosen.pop())
+					node = frame[1] = down[node]
+					if node == top:
+						frames.pop()
+						continue
+					if budget is not None and budget.spent(self.nodes):
+						return
+					row = owner[node]
+					self.select(row)
+					chosen.append(row)
+					self.nodes += 1
+					break
+				else:
+					return
+		finally:
+			while chosen:
+				self.deselect(chosen.pop())
+
+	def choose(self) -> int:
+		# fewest rows first; a column down to one row is forced, and one with none ends the branch
+		counts, right = self.counts, self.right
+		best, fewest = 0, self.size + 1
+		top = right[0]
+		while top:
+			if counts[top] < fewest:
+				best, fewest = top, counts[top]
+				if fewest <= 1:
+					break
+			top = right[top]
+		return best
+
+	def first(self) -> int:
+		# forced columns, then the first open cell in grid order: cell columns head the list.
+		# Blank grids fill in a few hundred nodes this way, where fewest rows first wanders off
+		counts, right = self.counts, self.right
+		top = right[0]
+		while top:
+			if counts[top] <= 1:
+				return top
+			top = right[top]
+		return right[0]
+
+	def count(self, limit: Optional[int] = None, budget: Optional[Budget] = None) -> int:
+		found = 0
+		for _ in self.solutions(budget):
+			found += 1
+			if limit is not None and found >= limit:
+				break
+		return found
+
+	def apply(self, solution: Rows):
+		values = self.grid.values
+		given = self.grid.given
+		for row in solution:
+			cell, digit = divmod(row, self.size)
+			if not given[cell]:
+				values[cell] = digit + 1
+
+	def affine(self, completion: AffineCompletion, budget: Budget) -> Iterator[Rows]:
+		solution = completion.complete(budget)
+		self.nodes = completion.nodes
+		if solution is not None:
+			yield [cell * self.size + digit - 1 for cell, digit in enumerate(solution.ravel().tolist())]
+
+	def strategies(self) -> list[Strategy]:
+		strategies = [
+			(partial(self.solutions, choose=self.choose), True),
+			(partial(self.solutions, choose=self.first), True),
+		]
+		box = self.grid.regioning.shape
+		if self.consistent and AffineCompletion.applicable(self.grid.dimensions, box):
+			# neither column order fills a blank 9^4 grid in reasonable time; the affine completion does
+			values = full(self.grid.count, EMPTY, dtype=int8)
+			for row in self.givens:
+				cell, digit = divmod(row, self.size)
+				values[cell] = digit + 1
+			completion = AffineCompletion(values.reshape((self.size,) * self.grid.dimensions), box[0])
+			strategies.append((partial(self.affine, completion), False))
+		return strategies
+
+	def solve(self, budget: Optional[Budget] = None) -> bool:
+		solution = restarts(self, self.strategies(), budget or Budget())
+		if solution is None:
+			return False
+		self.apply(solution)
+		return True
@@ -0,0 +1,148 @@
+from typing import (
+	Iterator,
+	NamedTuple,
+	Optional,
+)
+
+from numpy import (
+	arange,
+	int8,
+	ndarray,
+	random,
+)
+
+from grid import Regioning
+from grid.affine import pattern
+from grid.constants import EMPTY
+from grid.solver import (
+	Budget,
+	Solver,
+)
+from grid.sudoku import SudokuGrid
+
+
+class Progress(NamedTuple):
+	phase: str
+	givens: int
+	solutions: int
+
+
+def shuffle(solution: ndarray, box: tuple[int, int], rng: random.Generator) -> ndarray:
+	# relabel digits and permute bands, and rows within bands, independently along every axis
+	size = solution.shape[0]
+	rows, columns = box
+	labels = arange(size + 1, dtype=int8)
+	labels[1:] = rng.permutation(size) + 1
+	solution = labels[solution]
+	for axis in range(solution.ndim):
+		if rows == columns:
+			order = (rng.permutation(size // rows)[:, None] * rows + rng.permutation(rows)).ravel()
+			solution = solution.take(order, axis=axis)
+	return solution
+
+
+class PuzzleGenerator:
+
+	def __init__(
+			self,
+			grid: SudokuGrid,
+			seed: Optional[int] = None,
+			trials: int = 3,
+			nodes: Optional[int] = 2000,
+	):
+		self.grid = grid
+		self.givens = []
+		self.marks = []
+		self.nodes = nodes
+		self.rng = random.default_rng(seed)
+		self.solution = self.solved()
+		self.solver = None
+		self.trials = trials
+
+	def solved(self) -> ndarray:
+		rows, columns = self.grid.regioning.shape
+		solution = None
+		if rows == columns:
+			solution = pattern(self.grid.dimensions, rows)
+		if solution is None:
+			blank = SudokuGrid(self.grid.dimensions, Regioning(shape=(rows, columns)))
+			if not Solver(blank).solve():
+				raise ValueError('no solved grid exists for these dimensions and regioning')
+			solution = blank.field('values')
+		return shuffle(solution, (rows, columns), self.rng).ravel()
+
+	def bit(self, index: int) -> int:
+		return 1 << int(self.solution[index])
+
+	def count(self) -> int:
+		# a search cut short by the budget may have missed a second solution, so it never counts as unique
+		counted = self.solver.count(2, Budget(self.nodes))
+		return 2 if counted.exhausted else counted.count
+
+	def add(self, index: int):
+		self.marks.append(len(self.solver.trail))
+		self.givens.append(index)
+		self.solver.assign(index, self.bit(index))
+
+	def replay(self, start: int, skip: int) -> list[int]:
+		# undo back to given `start`, then re-add the later givens without `skip`; costs only their changes
+		solver = self.solver
+		solver.undo(self.marks[start])
+		marks = []
+		for index in self.givens[start:]:
+			if index != skip:
+				marks.append(len(solver.trail))
+				solver.assign(index, self.bit(index))
+		return marks
+
+	def additions(self) -> Iterator[Progress]:
+		solver = self.solver
+		solutions = 2
+		while solutions > 1:
+			open_cells = [i for i, mask in enumerate(solver.candidates) if mask & (mask - 1)]
+			if not open_cells:
+				# propagation filled every cell while the blind additions still counted several solutions
+				break
+			if len(open_cells) > self.grid.count // 2:
+				# far from unique, and counting sparse grids only burns the budget
+				self.add(int(self.rng.choice(open_cells)))
+				yield Progress('add', len(self.givens), solutions)
+				continue
+			best, fewest = None, None
+			for index in self.rng.choice(open_cells, min(self.trials, len(open_cells)), replace=False).tolist():
+				mark = len(solver.trail)
+				solver.assign(index, self.bit(index))
+				found = self.count()
+				solver.undo(mark)
+				if fewest is None or found < fewest:
+					best, fewest = index, found
+			self.add(best)
+			solutions = fewest
+			yield Progress('add', len(self.givens), solutions)
+
+	def removals(self) -> Iterator[Progress]:
+		# latest givens first, so most trials only replay a few changes
+		for position in range(len(self.givens) - 1, -1, -1):
+			marks = self.replay(position, self.givens[position])
+			if self.count() == 1:
+				del self.givens[position]
+			else:
+				marks = self.replay(position, -1)
+			self.marks[position:] = marks
+			yield Progress('remove', len(self.givens), 1)
+
+	def generate(self) -> Iterator[Progress]:
+		grid = self.grid
+		grid.values[:] = EMPTY
+		grid.given[:] = False
+		self.givens, self.marks = [], []
+		self.solver = Solver(grid, givens_only=True)
+		yield from self.additions()
+		yield from self.removals()
+		grid.values[self.givens] = self.solution[self.givens]
+		grid.given[self.givens] = True
+
+	def run(self) -> SudokuGrid:
+		for _ in self.generate():
+			pass
+		return self.grid
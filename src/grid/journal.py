@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+from itertools import count
+from os import (
+	makedirs,
+	path,
+	remove,
+)
+from typing import (
+	Iterator,
+	NamedTuple,
+	Optional,
+	TYPE_CHECKING,
+	Union,
+)
+
+from numpy import (
+	asarray,
+	concatenate,
+	flatnonzero,
+	int32,
+	load,
+	ndarray,
+	savez,
+	unique,
+)
+
+if TYPE_CHECKING:
+	from grid.sudoku import SudokuGrid
+
+JOURNAL_LIMIT = 16 << 20
+numbers = count()
+
+
+class Delta(NamedTuple):
+	field: str
+	indices: ndarray
+	old: ndarray
+	new: ndarray
+
+	@property
+	def nbytes(self) -> int:
+		return self.indices.nbytes + self.old.nbytes + self.new.nbytes
+
+
+Action = list[Delta]
+
+
+class Journal:
+	# undo history as one list of per-field deltas per user action; kept under `limit` bytes by spilling the
+	# oldest actions to files in `spill`, or by forgetting them when there is nowhere to spill
+
+	def __init__(self, grid: SudokuGrid, limit: int = JOURNAL_LIMIT, spill: Optional[str] = None):
+		self.depth = 0
+		self.grid = grid
+		self.limit = limit
+		self.nbytes = 0
+		self.pending: dict[str, list[tuple[ndarray, ndarray]]] = {}
+		self.redos: list[Action] = []
+		self.spill = spill
+		self.undos: deque[Union[Action, str]] = deque()
+		grid.journal = self
+
+	@property
+	def can_redo(self) -> bool:
+		return bool(self.redos)
+
+	@property
+	def can_undo(self) -> bool:
+		return bool(self.undos)
+
+	@contextmanager
+	def action(self) -> Iterator[Journal]:
+		# everything changed inside one `with` block is undone and redone as a single step
+		self.depth += 1
+		try:
+			yield self
+		finally:
+			self.depth -= 1
+			if not self.depth:
+				self.commit()
+
+	def apply(self, action: Action, undo: bool):
+		for delta in reversed(action) if undo else action:
+			getattr(self.grid, delta.field)[delta.indices] = delta.old if undo else delta.new
+		self.grid.notify(unique(concatenate([delta.indices for delta in action])))
+
+	def changed(self):
+		if not self.depth:
+			self.commit()
+
+	def clear(self):
+		for entry in self.undos:
+			if isinstance(entry, str):
+				remove(entry)
+		self.undos.clear()
+		self.redos.clear()
+		self.pending.clear()
+		self.nbytes = 0
+
+	def commit(self):
+		action = []
+		for name, touched in self.pending.items():
+			indices = concatenate([i for i, _ in touched])
+			old = concatenate([o for _, o in touched])
+			# a cell touched twice in one action keeps the value it had before the first touch
+			indices, first = unique(indices, return_index=True)
+			old = old[first]
+			new = getattr(self.grid, name)[indices]
+			changed = old != new
+			if changed.any():
+				action.append(Delta(name, indices[changed].astype(int32), old[changed], new[changed]))
+		self.pending.clear()
+		if action:
+			self.push(action)
+			self.redos.clear()
+
+	def push(self, action: Action):
+		self.undos.append(action)
+		self.nbytes += sum(delta.nbytes for delta in action)
+		while self.nbytes > self.limit and len(self.undos) > 1:
+			oldest = next((i for i, entry in enumerate(self.undos) if not isinstance(entry, str)), None)
+			if oldest is None or oldest == len(self.undos) - 1:
+				break
+			entry = self.undos[oldest]
+			self.nbytes -= sum(delta.nbytes for delta in entry)
+			if self.spill is None:
+				del self.undos[oldest]
+			else:
+				self.undos[oldest] = self.save(entry)
+
+	def redo(self) -> bool:
+		if not self.redos:
+			return False
+		action = self.redos.pop()
+		self.apply(action, False)
+		self.push(action)
+		return True
+
+	def restore(self, file: str) -> Action:
+		with load(file) as data:
+			action = [
+				Delta(str(name), data[f'{i}_indices'], data[f'{i}_old'], data[f'{i}_new'])
+				for i, name in enumerate(data['fields'].tolist())
+			]
+		remove(file)
+		return action
+
+	def save(self, action: Action) -> str:
+		makedirs(self.spill, exist_ok=True)
+		file = path.join(self.spill, f'journal-{id(self)}-{next(numbers)}.npz')
+		arrays = {'fields': asarray([delta.field for delta in action])}
+		for i, delta in enumerate(action):
+			arrays.update({f'{i}_indices': delta.indices, f'{i}_old': delta.old, f'{i}_new': delta.new})
+		savez(file, **arrays)
+		return file
+
+	def touch(self, name: str, where: Union[int, ndarray]):
+		# call before writing `where` of field `name`, so the value it had can be restored
+		where = asarray(where)
+		indices = flatnonzero(where) if where.dtype == bool else where.reshape(-1)
+		field = getattr(self.grid, name)
+		self.pending.setdefault(name, []).append((indices, field[indices]))
+
+	def undo(self) -> bool:
+		self.commit()
+		if not self.undos:
+			return False
+		entry = self.undos.pop()
+		if isinstance(entry, str):
+			entry = self.restore(entry)
+		else:
+			self.nbytes -= sum(delta.nbytes for delta in entry)
+		self.apply(entry, True)
+		self.redos.append(entry)
+		return True
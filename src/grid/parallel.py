@@ -0,0 +1,181 @@
+from concurrent.futures import (
+	ProcessPoolExecutor,
+	as_completed,
+)
+from multiprocessing import get_context
+from os import cpu_count
+from time import time
+from typing import (
+	NamedTuple,
+	Optional,
+)
+
+from numpy import ndarray
+
+from grid import Regioning
+from grid.solver import (
+	Assignments,
+	Budget,
+	Candidates,
+	Solver,
+	Stop,
+	restarts,
+	write_solution,
+)
+from grid.sudoku import SudokuGrid
+
+MAX_DEPTH = 8
+stop_signal: Optional[Stop] = None
+solvers: dict[tuple, Solver] = {}
+
+
+class Puzzle(NamedTuple):
+	dimensions: int
+	box: tuple[int, int]
+	values: ndarray
+
+	@staticmethod
+	def from_grid(grid: SudokuGrid, givens_only: bool = False) -> 'Puzzle':
+		values = grid.values.copy()
+		if givens_only:
+			values[~grid.given] = -1
+		return Puzzle(grid.dimensions, tuple(grid.regioning.shape), values)
+
+	@property
+	def key(self) -> tuple:
+		return self.dimensions, self.box, self.values.tobytes()
+
+	def grid(self) -> SudokuGrid:
+		grid = SudokuGrid(self.dimensions, Regioning(shape=self.box))
+		grid.values[:] = self.values
+		grid.given[:] = self.values >= 0
+		return grid
+
+
+class Outcome(NamedTuple):
+	count: int
+	solution: Optional[Candidates]
+	nodes: int
+	exhausted: bool = False
+
+
+def share(stop: Stop):
+	global stop_signal
+	stop_signal = stop
+
+
+def worker_solver(puzzle: Puzzle) -> Solver:
+	# a worker usually receives many branches of the same puzzle, so its propagated base state is kept
+	solver = solvers.get(puzzle.key)
+	if solver is None:
+		solvers.clear()
+		solver = solvers[puzzle.key] = Solver(puzzle.grid())
+	return solver
+
+
+def search_branch(
+		puzzle: Puzzle,
+		branch: Assignments,
+		limit: Optional[int] = None,
+		deadline: Optional[float] = None,
+) -> Outcome:
+	# `deadline` is wall-clock time, the one clock every worker process shares
+	solver = worker_solver(puzzle)
+	mark = len(solver.trail)
+	count, solution = 0, None
+	solver.nodes = 0
+	budget = Budget(seconds=None if deadline is None else max(0.0, deadline - time()), stop=stop_signal)
+	try:
+		consistent = all(solver.assign(index, bit) for index, bit in branch)
+		if consistent and limit == 1:
+			# one solution is all that is asked for, so the restarts of Solver.solve apply, within the branch
+			values = puzzle.values.copy()
+			for index, bit in branch:
+				values[index] = bit.bit_length() - 1
+			solution = restarts(solver, solver.strategies(values), budget)
+			count = int(solution is not None)
+		elif consistent:
+			for candidates in solver.solutions(budget):
+				if solution is None:
+					solution = candidates
+				count += 1
+				if limit is not None and count >= limit:
+					break
+	finally:
+		solver.undo(mark)
+	# a stop set by the parent after enough solutions is not this branch running out
+	stopped = stop_signal is not None and stop_signal.is_set()
+	return Outcome(count, solution, solver.nodes, budget.exhausted and not stopped)
+
+
+class ParallelSearch:
+
+	def __init__(
+			self,
+			grid: SudokuGrid,
+			depth: Optional[int] = None,
+			workers: Optional[int] = None,
+			givens_only: bool = False,
+			seconds: Optional[float] = None,
+	):
+		self.depth = depth
+		self.exhausted = False
+		self.grid = grid
+		self.nodes = 0
+		self.seconds = seconds
+		self.puzzle = Puzzle.from_grid(grid, givens_only)
+		self.workers = workers or cpu_count() or 1
+
+	def branches(self) -> list[Assignments]:
+		solver = Solver(self.puzzle.grid())
+		if not solver.consistent:
+			return []
+		if self.depth is not None:
+			return list(solver.branches(self.depth))
+		# deepen until there are enough subproblems to even out their uneven sizes across workers
+		branches = [[]]
+		for depth in range(1, MAX_DEPTH + 1):
+			deeper = list(solver.branches(depth))
+			if len(deeper) <= len(branches):
+				break
+			branches = deeper
+			if len(branches) >= 4 * self.workers:
+				break
+		return branches
+
+	def run(self, limit: Optional[int] = None) -> Outcome:
+		# with `seconds` set, a count or a failed solve may be short, and `exhausted` tells so
+		count, solution, self.nodes, self.exhausted = 0, None, 0, False
+		deadline = None if self.seconds is None else time() + self.seconds
+		branches = self.branches()
+		if not branches:
+			return Outcome(0, None, 0)
+		context = get_context()
+		stop = context.Event()
+		with ProcessPoolExecutor(self.workers, context, share, (stop,)) as executor:
+			futures = [executor.submit(search_branch, self.puzzle, branch, limit, deadline) for branch in branches]
+			for future in as_completed(futures):
+				outcome = future.result()
+				count += outcome.count
+				self.nodes += outcome.nodes
+				self.exhausted |= outcome.exhausted
+				if solution is None:
+					solution = outcome.solution
+				if limit is not None and count >= limit:
+					stop.set()
+					for pending in futures:
+						pending.cancel()
+					break
+		if limit is not None:
+			count = min(count, limit)
+		return Outcome(count, solution, self.nodes, self.exhausted)
+
+	def count(self, limit: Optional[int] = None) -> int:
+		return self.run(limit).count
+
+	def solve(self) -> bool:
+		solution = self.run(1).solution
+		if solution is None:
+			return False
+		write_solution(self.grid, solution)
+		return True
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
-from asyncio import new_event_loop
-from concurrent.futures.thread import ThreadPoolExecutor
+from collections import OrderedDict
 from enum import auto
+from functools import lru_cache
+from math import (
+	ceil,
+	sqrt,
+)
+from threading import Lock
 from typing import (
 	ForwardRef,
+	NamedTuple,
 	Optional,
 	TYPE_CHECKING,
 	Union,
 )
 
+from numpy import (
+	bool_,
+	zeros,
+)
 from pygame import (
 	Color,
 	Rect,
@@ -27,78 +37,122 @@ from grid.sudoku import SudokuCell
 from rendering import (
 	Colors,
 	Rendering,
-	Size,
 )
 from rendering.graphics import (
 	blit_center,
-	center,
 	render_text,
 )
+from rendering.scheduler import RenderScheduler
 from util.enums import AutoName
+from util.instrument import instruments
+
+LAYOUT_CACHE = 256
+SPRITE_CACHE = 1024
 
 if TYPE_CHECKING:
 	from rendering.renderer import Renderer
 
 
 class PencilMarks:
-	formulae = [
-		('m', 'm'),
-		('d.w-m-s.w', 'm'),
-		('m', 'd.h-m-s.h'),
-		('d.w-m-s.w', 'd.h-m-s.h'),
-		('c.x', 'm'),
-		('c.x', 'd.h-m-s.h'),
-		('m', 'c.y'),
-		('d.w-m-s.w', 'c.y'),
-		('c.x-m', 'c.y'),
-		('c.x+m', 'c.y'),
-	]
-
-	def __init__(self, size: Size):
-		self.center = Surface(size, flags=SRCALPHA)
-		self.corner = Surface(size, flags=SRCALPHA)
-
-	def corner_coordinates(self, texts: list[Surface], margin: Optional[int] = 5) -> list[Rect]:
-		coordinates = []
-		m = margin
-		d = self.corner.get_rect()  # d for destination
-		for i, t in enumerate(texts):
-			c = center(t, self.corner)
-			s = t.get_rect()  # s for source
-			formula = PencilMarks.formulae[i]
-			coord = [eval(f, loc) for loc in (locals(),) for f in formula]
-			coordinates.append(Rect(*coord, 0, 0))
-		return coordinates
-
-	def render(self, cell: ForwardRef('CellRenderer')):
-		digits_corner = cell.cell.convert(SudokuCell.Field.CONTINGENCY)
-		digits_center = cell.cell.convert(SudokuCell.Field.CANDIDATE)
-		texts_corner = [render_text(cell.font, str(n), 20, cell.color) for n in digits_corner]
-		text_center = render_text(cell.font, ''.join(str(n) for n in digits_center), 25, cell.color)
-		coord_corner = self.corner_coordinates(texts_corner)
-		self.center.fill(Colors.EMPTY)
-		self.corner.fill(Colors.EMPTY)
-		blit_center(text_center, self.center)
-		self.corner.blits(list(zip(texts_corner, coord_corner)), False)
+
+	@staticmethod
+	@lru_cache(LAYOUT_CACHE)
+	def layout(size: tuple[int, int], glyph: tuple[int, int], count: int, margin: int = 5) -> tuple[tuple[int, int], ...]:
+		# top left corner of each corner mark, in the order marks are placed, for glyphs of one size
+		w, h = size
+		left, top = margin, margin
+		right, bottom = w - margin - glyph[0], h - margin - glyph[1]
+		x, y = (w - glyph[0]) // 2, (h - glyph[1]) // 2
+		if count <= 10:
+			return (
+				(left, top), (right, top), (left, bottom), (right, bottom), (x, top),
+				(x, bottom), (left, y), (right, y), (x - margin, y), (x + margin, y),
+			)[:count]
+		columns = ceil(sqrt(count))
+		rows = ceil(count / columns)
+		return tuple(
+			(left + (right - left) * (i % columns) // (columns - 1), top + (bottom - top) * (i // columns) // max(rows - 1, 1))
+			for i in range(count)
+		)
+
+	@staticmethod
+	def corner_coordinates(texts: list[Surface], dest: Surface, margin: Optional[int] = 5) -> list[tuple[int, int]]:
+		size = dest.get_size()
+		return [PencilMarks.layout(size, t.get_size(), len(texts), margin)[i] for i, t in enumerate(texts)]
+
+	@staticmethod
+	def render(dest: Surface, font: str, color: Color, state: CellState):
+		# text sizes follow the cell size, matching the original layout at 50px cells
+		size = dest.get_width()
+		if state.candidates > 0:
+			digits = SudokuCell.digits(state.candidates)
+			blit_center(render_text(font, ''.join(str(n) for n in digits), size // 2, color), dest)
+		if state.contingencies > 0:
+			texts = [render_text(font, str(n), size * 2 // 5, color) for n in SudokuCell.digits(state.contingencies)]
+			dest.blits(list(zip(texts, PencilMarks.corner_coordinates(texts, dest, size // 10))), False)
+
+
+class CellState(NamedTuple):
+	value: Union[int, str]
+	given: bool
+	candidates: int
+	contingencies: int
+	selected: bool
+	color: int
+
+
+class SpriteCache:
+	# one finished surface per distinct look of a cell, shared by every cell that currently looks that way
+
+	def __init__(self, rendering: Rendering, limit: int = SPRITE_CACHE):
+		self.colors = [Colors.PENCIL, Colors.BLACK]
+		self.limit = limit
+		self.lock = Lock()
+		self.rendering = rendering
+		self.sprites = OrderedDict()
+		size = rendering.cell_size
+		self.border = Surface(rendering.size(), flags=SRCALPHA)
+		self.selection = Surface(rendering.size(), flags=SRCALPHA)
+		drawing.rect(self.border, Colors.BLACK, (0, 0, size, size), rendering.width)
+		self.selection.fill(Colors.SELECTED)
+
+	def __len__(self) -> int:
+		return len(self.sprites)
+
+	def draw(self, state: CellState) -> Surface:
+		sprite = Surface(self.rendering.size(), flags=SRCALPHA)
+		sprite.fill(Colors.WHITE)
+		sprite.blit(self.border, (0, 0))
+		font = self.rendering.font
+		color = self.colors[int(state.given)]
+		if state.value == '':
+			PencilMarks.render(sprite, font, color, state)
+		else:
+			blit_center(render_text(font, str(state.value), self.rendering.cell_size, color), sprite)
+		if state.selected:
+			sprite.blit(self.selection, (0, 0))
+		return sprite
+
+	def get(self, state: CellState) -> Surface:
+		with self.lock:
+			sprite = self.sprites.get(state)
+			if sprite is not None:
+				self.sprites.move_to_end(state)
+				return sprite
+		sprite = self.draw(state)
+		with self.lock:
+			self.sprites[state] = sprite
+			if len(self.sprites) > self.limit:
+				self.sprites.popitem(False)
+		return sprite
 
 
 class CellRenderer(Cell):
 
 	def __init__(self, grid: ForwardRef('GridRenderer')):
 		super().__init__(grid)
-		self.colors = [Colors.PENCIL, Colors.BLACK]
-		self.interacted = False
+		self.background = None
 		self.ready = False
-		self.selected = False
-		self.background = Surface(self.size, flags=SRCALPHA)
-		self.border = Surface(self.size, flags=SRCALPHA)
-		self.selection = Surface(self.size, flags=SRCALPHA)
-		self.value = Surface(self.size, flags=SRCALPHA)
-		self.pencil_marks = PencilMarks(self.size)
-		width = self.rendering.width
-		size = self.rendering.cell_size
-		drawing.rect(self.border, Colors.BLACK, (0, 0, size, size), width)
-		self.selection.fill(Colors.SELECTED)
 
 	@property
 	def renderer(self) -> Renderer:
@@ -114,39 +168,38 @@ class CellRenderer(Cell):
 		return self.renderer.get_cell(self)
 
 	@property
-	def color(self) -> Color:
-		return self.colors[int(self.cell.given)]
+	def interacted(self) -> bool:
+		return bool(self.grid.interacted[self.grid.get_coordinates(self)])
+
+	@interacted.setter
+	def interacted(self, interacted: bool):
+		self.grid.interacted[self.grid.get_coordinates(self)] = interacted
 
 	@property
-	def font(self) -> str:
-		return self.rendering.font
+	def selected(self) -> bool:
+		return self.cell.index in self.renderer.selection
+
+	@selected.setter
+	def selected(self, selected: bool):
+		self.renderer.selection.set(self.cell.index, selected)
 
 	@property
 	def size(self) -> tuple[int, int]:
 		return self.rendering.size()
 
+	@property
+	def state(self) -> CellState:
+		cell = self.cell
+		value = cell.value
+		candidates, contingencies = (cell.candidates, cell.contingencies) if value == '' else (0, 0)
+		return CellState(value, cell.given, candidates, contingencies, cell.index in self.renderer.selection, cell.color)
+
 	def render(self):
 		if not self.renderer.game.running:
 			return
 		self.ready = False
-		self.pencil_marks.render(self)
-		self.background.fill(Colors.WHITE)
-		self.value.fill(Colors.EMPTY)
-		blit_center(render_text(self.font, str(self.cell.value), 50, self.color), self.value)
-		surfs = [self.border]
-		if self.cell.value == '':
-			if self.cell.candidates > 0:
-				surfs.append(self.pencil_marks.center)
-			if self.cell.contingencies > 0:
-				surfs.append(self.pencil_marks.corner)
-		else:
-			surfs.append(self.value)
-		if self.selected:
-			surfs.append(self.selection)
-		for s in surfs:
-			if not self.renderer.game.running:
-				return
-			self.background.blit(s, (0, 0))
+		with instruments.span('cell.render'):
+			self.background = self.grid.sprites.get(self.state)
 		self.ready = True
 
 
@@ -166,32 +219,49 @@ class GridRenderer(Grid):
 			regioning: Union[int, Regioning],
 	):
 		self.renderer = renderer
+		self.dirty = set()
+		self.sprites = SpriteCache(renderer.rendering)
 		super().__init__(2, regioning, CellRenderer)
-		self.executor = ThreadPoolExecutor()
-		self.loop = new_event_loop()
+		self.interacted = zeros(self.shape, bool_)
+		self.scheduler = RenderScheduler(self.renderer.rendering.threads)
 		margin = self.renderer.grid.regioning.size(extra=(1, 1))
 		size_calc = self.renderer.rendering.size(self.size, margin=margin)
 		self.surface = Surface(size_calc, flags=SRCALPHA)
 		x, y, l, w = top_left + size_calc
 		self.rect = Rect(x, y, w + x, l + y)
+		self.mark_all()
 
 	def clear(self, target: Clearable):
-		for cell in self.iterator():
-			if target == GridRenderer.Clearable.INTERACTIONS:
-				cell[()].interacted = False
-			elif target == GridRenderer.Clearable.SELECTIONS:
-				cell[()].selected = False
-			else:
-				raise GridRenderer.Clearable.error('target')
+		if target == GridRenderer.Clearable.INTERACTIONS:
+			self.interacted[:] = False
+		elif target == GridRenderer.Clearable.SELECTIONS:
+			self.renderer.selection.clear()
+		else:
+			raise GridRenderer.Clearable.error('target')
 
-	def render(self):
-		for cell in self.iterator():
-			if not self.renderer.game.running:
-				return
-			self.loop.run_in_executor(self.executor, cell[()].render)
+	def mark(self, cell: CellRenderer):
+		self.dirty.add(cell)
+
+	def mark_all(self):
+		self.dirty.update(self.cells.flat)
+
+	def render(self) -> list[Rect]:
+		# only cells marked since the last frame are redrawn; returns the screen areas that changed
+		if not self.dirty or not self.renderer.game.running:
+			return []
+		cells = list(self.dirty)
+		self.dirty.clear()
+		with instruments.span('plane.render'):
+			self.scheduler.run(CellRenderer.render, cells)
 		size = self.renderer.rendering.size
-		for coord, cell in self.enumerator:
+		rects = []
+		for cell in cells:
 			if not self.renderer.game.running:
-				return
+				return rects
 			if cell.ready:
-				self.surface.blit(cell.background, Rect(*size(coord), *cell.background.get_rect().size))
+				rect = Rect(*size(self.get_coordinates(cell)), *cell.background.get_rect().size)
+				self.surface.blit(cell.background, rect)
+				rects.append(rect.move(self.rect.topleft))
+			else:
+				self.dirty.add(cell)
+		return rects
@@ -0,0 +1,78 @@
+from typing import (
+	Callable,
+	Union,
+)
+
+from numpy import (
+	bool_,
+	flatnonzero,
+	ndarray,
+	ones,
+	zeros,
+)
+
+from grid.sudoku import SudokuGrid
+
+Where = Union[ndarray, list[int]]
+
+
+class Selection:
+	# one flag per cell of the whole grid; `where` arguments are flat indices or a mask of either shape
+
+	def __init__(self, grid: SudokuGrid):
+		self.grid = grid
+		self.listeners: list[Callable] = []
+		self.mask = zeros(grid.shape, bool_)
+		self.flat = self.mask.reshape(-1)
+
+	def __contains__(self, index: int) -> bool:
+		return bool(self.flat[index])
+
+	@property
+	def count(self) -> int:
+		return int(self.flat.sum())
+
+	@property
+	def indices(self) -> ndarray:
+		return flatnonzero(self.flat)
+
+	def add(self, where: Where):
+		self.update(self.flat | self.grid.mask(where))
+
+	def clear(self):
+		self.update(zeros(self.flat.shape, bool_))
+
+	def notify(self, where: Union[int, ndarray, None] = None):
+		# same convention as SudokuGrid.notify: flat indices of the cells that changed, None for any number
+		for listener in self.listeners:
+			listener(where)
+
+	def remove(self, where: Where):
+		self.update(self.flat & ~self.grid.mask(where))
+
+	def select(self, where: Where):
+		self.update(self.grid.mask(where))
+
+	def select_all(self):
+		self.update(ones(self.flat.shape, bool_))
+
+	def select_digit(self, digit: int):
+		# every cell showing `digit`, or marking it as a candidate or contingency
+		bit = 1 << digit
+		grid = self.grid
+		self.update((grid.values == digit) | ((grid.candidates | grid.contingencies) & bit > 0))
+
+	def set(self, index: int, selected: bool):
+		if self.flat[index] != selected:
+			self.flat[index] = selected
+			self.notify(index)
+
+	def toggle(self, where: Where):
+		self.update(self.flat ^ self.grid.mask(where))
+
+	def update(self, flat: ndarray):
+		# replaces the whole selection, telling listeners only about the cells that flipped
+		changed = flatnonzero(flat != self.flat)
+		if changed.size:
+			self.flat[:] = flat
+			self.notify(changed)
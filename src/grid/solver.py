@@ -0,0 +1,357 @@
+from functools import (
+	lru_cache,
+	partial,
+)
+from time import perf_counter
+from typing import (
+	Callable,
+	Iterator,
+	NamedTuple,
+	Optional,
+	Protocol,
+)
+
+from numpy import (
+	array,
+	log2,
+	ndarray,
+	where,
+)
+
+from grid.affine import AffineCompletion
+from grid.constants import EMPTY
+from grid.sudoku import SudokuGrid
+from grid.units import regioning_index
+from util.instrument import instruments
+
+Assignments = list[tuple[int, int]]
+Candidates = list[int]
+
+# nodes in the first round of restarts; every round doubles it
+RESTART_NODES = 256
+
+
+class SolutionCount(NamedTuple):
+	count: int
+	nodes: int
+	exhausted: bool
+
+
+class Stop(Protocol):
+
+	def is_set(self) -> bool:
+		...
+
+
+@lru_cache
+def popcounts(size: int) -> Optional[list[int]]:
+	if size > 16:
+		return None
+	return [bin(mask).count('1') for mask in range(1 << (size + 1))]
+
+
+def write_solution(grid: SudokuGrid, candidates: Candidates):
+	digits = log2(array(candidates)).astype(grid.values.dtype)
+	free = ~grid.given
+	grid.values[free] = digits[free]
+
+
+class Budget:
+
+	def __init__(
+			self,
+			nodes: Optional[int] = None,
+			seconds: Optional[float] = None,
+			stop: Optional[Stop] = None,
+	):
+		self.exhausted = False
+		self.nodes = nodes
+		self.seconds = seconds
+		self.start = perf_counter()
+		self.stop = stop
+
+	def spent(self, nodes: int) -> bool:
+		if self.nodes is not None and nodes >= self.nodes:
+			self.exhausted = True
+		elif nodes & 0xff == 0:
+			# the clock and a cross-process stop flag are too costly to poll on every node
+			if self.seconds is not None and perf_counter() - self.start >= self.seconds:
+				self.exhausted = True
+			elif self.stop is not None and self.stop.is_set():
+				self.exhausted = True
+		return self.exhausted
+
+	def expired(self, nodes: int) -> bool:
+		# the full check, for callers between searches rather than on every node
+		if self.nodes is not None and nodes >= self.nodes:
+			self.exhausted = True
+		elif self.seconds is not None and perf_counter() - self.start >= self.seconds:
+			self.exhausted = True
+		elif self.stop is not None and self.stop.is_set():
+			self.exhausted = True
+		return self.exhausted
+
+	def share(self, nodes: int, spent: int) -> 'Budget':
+		# at most `nodes` of what is left after `spent`, on the same clock and stop flag
+		if self.nodes is not None:
+			nodes = min(nodes, self.nodes - spent)
+		share = Budget(nodes, self.seconds, self.stop)
+		share.start = self.start
+		return share
+
+
+class Searcher(Protocol):
+	nodes: int
+
+
+# a search taking its share of the budget, and whether running out of branches settles the grid
+Strategy = tuple[Callable[[Budget], Iterator], bool]
+
+
+def restarts(searcher: Searcher, strategies: list[Strategy], budget: Budget) -> Optional[list[int]]:
+	# each strategy gets the next share of the budget, doubling every round, as searches that stall on a grid
+	# often have a rival that does not; an exhaustive one running out of branches proves there is no solution,
+	# any other only drops out
+	spent = 0
+	limit = RESTART_NODES
+	while strategies and not budget.expired(spent):
+		for strategy in list(strategies):
+			search, exhaustive = strategy
+			share = budget.share(limit, spent)
+			for solution in search(share):
+				searcher.nodes += spent
+				return solution
+			spent += searcher.nodes
+			if not share.exhausted:
+				if exhaustive:
+					strategies = []
+					break
+				strategies.remove(strategy)
+		limit *= 2
+	searcher.nodes = spent
+	return None
+
+
+class Solver:
+
+	def __init__(self, grid: SudokuGrid, givens_only: bool = False):
+		self.grid = grid
+		self.givens_only = givens_only
+		self.size = grid.size
+		self.full = ((1 << self.size) - 1) << 1
+		self.nodes = 0
+		self.trail = []
+		self.index = regioning_index(grid.dimensions, grid.regioning)
+		self.units, self.cell_units, self.peers = self.index.lists
+		self.candidates = []
+		self.loaded = None
+		self.consistent = self.load()
+
+	def filled(self) -> ndarray:
+		values = self.grid.values.copy()
+		if self.givens_only:
+			values[~self.grid.given] = EMPTY
+		return values
+
+	def load(self) -> bool:
+		self.trail = []
+		self.candidates = [self.full] * self.grid.count
+		self.loaded = values = self.filled()
+		queue = where(values >= 0)[0].tolist()
+		for index in queue:
+			bit = 1 << int(values[index])
+			if not self.full & bit:
+				return False
+			self.candidates[index] = bit
+		return self.propagate(queue, set(range(len(self.units))))
+
+	def assign(self, index: int, bit: int) -> bool:
+		mask = self.candidates[index]
+		if not mask & bit:
+			return False
+		if mask != bit:
+			self.trail.append((index, mask))
+			self.candidates[index] = bit
+		return self.propagate([index], set(self.cell_units[index]))
+
+	def propagate(self, queue: list[int], dirty: set[int]) -> bool:
+		candidates = self.candidates
+		cell_units = self.cell_units
+		peers = self.peers
+		trail = self.trail
+		units = self.units
+		full = self.full
+		while queue or dirty:
+			# naked singles: a solved cell removes its digit from every peer
+			while queue:
+				index = queue.pop()
+				bit = candidates[index]
+				for peer in peers[index]:
+					mask = candidates[peer]
+					if mask & bit:
+						mask ^= bit
+						if not mask:
+							return False
+						trail.append((peer, mask | bit))
+						candidates[peer] = mask
+						if not mask & (mask - 1):
+							queue.append(peer)
+						dirty.update(cell_units[peer])
+			if not dirty:
+				break
+			# hidden singles: a digit with one place left in a unit belongs there
+			unit = units[dirty.pop()]
+			once = twice = 0
+			for index in unit:
+				mask = candidates[index]
+				twice |= once & mask
+				once |= mask
+			if once != full:
+				return False
+			hidden = once & ~twice
+			if not hidden:
+				continue
+			for index in unit:
+				mask = candidates[index]
+				single = mask & hidden
+				if single and mask != single:
+					if single & (single - 1):
+						return False
+					trail.append((index, mask))
+					candidates[index] = single
+					queue.append(index)
+					dirty.update(cell_units[index])
+		return True
+
+	def choose(self) -> int:
+		best, fewest = -1, self.size + 1
+		counts = popcounts(self.size)
+		for index, mask in enumerate(self.candidates):
+			if mask & (mask - 1):
+				count = counts[mask] if counts is not None else bin(mask).count('1')
+				if count < fewest:
+					best, fewest = index, count
+					if count == 2:
+						break
+		return best
+
+	def first(self) -> int:
+		# grid order fills blank grids in a few hundred nodes, where fewest candidates first wanders off
+		for index, mask in enumerate(self.candidates):
+			if mask & (mask - 1):
+				return index
+		return -1
+
+	def sync(self) -> bool:
+		# digits added since the last load are propagated on top of the kept state; anything else reloads
+		values = self.filled()
+		changed = values != self.loaded
+		if (self.loaded[changed] >= 0).any():
+			self.consistent = self.load()
+			return self.consistent
+		if self.consistent:
+			for index in where(changed)[0].tolist():
+				if not self.assign(index, 1 << int(values[index])):
+					self.consistent = False
+					break
+		self.trail = []
+		self.loaded = values
+		return self.consistent
+
+	def undo(self, mark: int):
+		candidates = self.candidates
+		trail = self.trail
+		while len(trail) > mark:
+			index, mask = trail.pop()
+			candidates[index] = mask
+
+	def branches(self, depth: int) -> Iterator[Assignments]:
+		index = self.choose() if depth > 0 else -1
+		if index < 0:
+			yield []
+			return
+		mark = len(self.trail)
+		remaining = self.candidates[index]
+		while remaining:
+			bit = remaining & -remaining
+			remaining ^= bit
+			if self.assign(index, bit):
+				for rest in self.branches(depth - 1):
+					yield [(index, bit)] + rest
+			self.undo(mark)
+
+	def solutions(
+			self,
+			budget: Optional[Budget] = None,
+			choose: Optional[Callable[[], int]] = None,
+	) -> Iterator[Candidates]:
+		self.nodes = 0
+		if not self.consistent:
+			return
+		choose = choose or self.choose
+		base = len(self.trail)
+		frames = []
+		try:
+			while True:
+				index = choose()
+				if index < 0:
+					yield list(self.candidates)
+				else:
+					frames.append([len(self.trail), index, self.candidates[index]])
+				while frames:
+					frame = frames[-1]
+					mark, index, remaining = frame
+					self.undo(mark)
+					if not remaining:
+						frames.pop()
+						continue
+					if budget is not None and budget.spent(self.nodes):
+						return
+					bit = remaining & -remaining
+					frame[2] = remaining ^ bit
+					self.nodes += 1
+					if self.assign(index, bit):
+						break
+				else:
+					return
+		finally:
+			self.undo(base)
+
+	def apply(self, candidates: Candidates):
+		write_solution(self.grid, candidates)
+
+	def count(self, limit: Optional[int] = 2, budget: Optional[Budget] = None) -> SolutionCount:
+		found = 0
+		with instruments.span('solver.count'):
+			for _ in self.solutions(budget):
+				found += 1
+				if limit is not None and found >= limit:
+					break
+		return SolutionCount(found, self.nodes, budget is not None and budget.exhausted)
+
+	def affine(self, completion: AffineCompletion, budget: Budget) -> Iterator[Candidates]:
+		solution = completion.complete(budget)
+		self.nodes = completion.nodes
+		if solution is not None:
+			yield [1 << digit for digit in solution.ravel().tolist()]
+
+	def strategies(self, values: ndarray) -> list[Strategy]:
+		# what solve() restarts between; the affine completion has to keep the digits in `values`
+		strategies = [
+			(partial(self.solutions, choose=self.choose), True),
+			(partial(self.solutions, choose=self.first), True),
+		]
+		box = self.grid.regioning.shape
+		if AffineCompletion.applicable(self.grid.dimensions, box):
+			# sparse grids stall both searches, unless their solution has the affine form
+			completion = AffineCompletion(values.reshape((self.size,) * self.grid.dimensions), box[0])
+			strategies.append((partial(self.affine, completion), False))
+		return strategies
+
+	def solve(self, budget: Optional[Budget] = None) -> bool:
+		with instruments.span('solver.solve'):
+			solution = restarts(self, self.strategies(self.filled()), budget or Budget())
+		if solution is None:
+			return False
+		self.apply(solution)
+		return True
@@ -0,0 +1,149 @@
+from json import (
+	dump,
+	load as load_json_file,
+)
+from struct import Struct
+from typing import (
+	Any,
+	Optional,
+)
+
+from numpy import (
+	array,
+	dtype,
+	memmap,
+	ndarray,
+	prod,
+)
+
+from grid import (
+	Coordinates,
+	Regioning,
+)
+from grid.sudoku import SudokuGrid
+from grid.view import check_coordinates
+
+MAGIC = b'HDPP'
+VERSION = 1
+# magic, version, dimensions, size, box rows, box columns, regular
+HEADER = Struct('<4sHBBBB?x')
+ALIGNMENT = 8
+# base-36 digits of the text format
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def aligned(offset: int) -> int:
+	return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class Layout:
+	# where each SudokuGrid field sits in a file, in SudokuGrid.fields order after the header
+
+	def __init__(self, dimensions: int, size: int):
+		self.dimensions = dimensions
+		self.shape = (size,) * dimensions
+		self.offsets = {}
+		offset = aligned(HEADER.size)
+		count = int(prod(self.shape))
+		for name, (field_type, _) in SudokuGrid.fields.items():
+			self.offsets[name] = offset
+			offset = aligned(offset + count * dtype(field_type).itemsize)
+		self.end = offset
+
+	def map(self, file: str, name: str, mode: str = 'r') -> memmap:
+		return memmap(file, SudokuGrid.fields[name][0], mode, self.offsets[name], self.shape)
+
+
+def read_header(file: str) -> tuple[Layout, Regioning]:
+	with open(file, 'rb') as stream:
+		header = stream.read(HEADER.size)
+	if len(header) < HEADER.size:
+		raise ValueError(f'{file} is too short to be a puzzle file')
+	magic, version, dimensions, size, rows, columns, regular = HEADER.unpack(header)
+	if magic != MAGIC:
+		raise ValueError(f'{file} is not a puzzle file')
+	if version > VERSION:
+		raise ValueError(f'{file} is version {version}; only up to {VERSION} is supported')
+	return Layout(dimensions, size), Regioning(regular, (rows, columns))
+
+
+def save(grid: SudokuGrid, file: str):
+	layout = Layout(grid.dimensions, grid.size)
+	rows, columns = grid.regioning.shape
+	with open(file, 'wb') as stream:
+		stream.write(HEADER.pack(MAGIC, VERSION, grid.dimensions, grid.size, rows, columns, grid.regioning.regular))
+		for name, offset in layout.offsets.items():
+			stream.write(bytes(offset - stream.tell()))
+			stream.write(getattr(grid, name).tobytes())
+		stream.write(bytes(layout.end - stream.tell()))
+
+
+def load(file: str, mode: Optional[str] = 'c') -> SudokuGrid:
+	# 'c' maps copy-on-write, 'r+' writes edits through to the file and None reads everything into memory
+	layout, regioning = read_header(file)
+	arrays = {}
+	for name in SudokuGrid.fields:
+		field = layout.map(file, name, mode or 'r')
+		arrays[name] = field.reshape(-1) if mode else array(field).reshape(-1)
+	return SudokuGrid(layout.dimensions, regioning, arrays)
+
+
+def read_plane(file: str, coordinates: Coordinates, name: str = 'values') -> ndarray:
+	# coordinates as in Renderer.set_view: -1 marks the two axes of the plane
+	layout, _ = read_header(file)
+	check_coordinates(coordinates, layout.dimensions)
+	index = tuple(slice(None) if c < 0 else c for c in coordinates)
+	return array(layout.map(file, name)[index])
+
+
+def from_text(line: str) -> SudokuGrid:
+	# "<dimensions> <rows>x<columns> <cells>", cells in C order as base-36 digits with '.' or '0' for empty
+	dimensions, box, cells = line.split()
+	rows, columns = (int(n) for n in box.split('x'))
+	grid = SudokuGrid(int(dimensions), Regioning(shape=(rows, columns)))
+	if len(cells) != grid.count:
+		raise ValueError(f'expected {grid.count} cells, got {len(cells)}')
+	values = array([0 if c == '.' else int(c, 36) for c in cells])
+	filled = values > 0
+	grid.values[filled] = values[filled]
+	grid.given[:] = filled
+	return grid
+
+
+def to_text(grid: SudokuGrid) -> str:
+	rows, columns = grid.regioning.shape
+	cells = ''.join('.' if v < 0 else ALPHABET[v] for v in grid.values.tolist())
+	return f'{grid.dimensions} {rows}x{columns} {cells}'
+
+
+def to_json(grid: SudokuGrid) -> dict[str, Any]:
+	data = {
+		'version': VERSION,
+		'dimensions': grid.dimensions,
+		'regioning': {
+			'regular': grid.regioning.regular,
+			'shape': list(grid.regioning.shape),
+		},
+	}
+	for name in SudokuGrid.fields:
+		data[name] = getattr(grid, name).tolist()
+	return data
+
+
+def from_json(data: dict[str, Any]) -> SudokuGrid:
+	regioning = Regioning(data['regioning']['regular'], tuple(data['regioning']['shape']))
+	grid = SudokuGrid(data['dimensions'], regioning)
+	for name in SudokuGrid.fields:
+		if name in data:
+			getattr(grid, name)[:] = data[name]
+	return grid
+
+
+def save_json(grid: SudokuGrid, file: str):
+	with open(file, 'w') as stream:
+		dump(to_json(grid), stream)
+
+
+def load_json(file: str) -> SudokuGrid:
+	with open(file) as stream:
+		return from_json(load_json_file(stream))
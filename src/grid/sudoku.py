@@ -1,19 +1,66 @@
+from __future__ import annotations
+
 from enum import auto
+from contextlib import nullcontext
+from functools import lru_cache
 from typing import (
+	Callable,
+	ContextManager,
 	ForwardRef,
+	Optional,
+	TYPE_CHECKING,
 	Union,
 )
 
+from numpy import (
+	asarray,
+	bitwise_or,
+	bool_,
+	flatnonzero,
+	full,
+	int8,
+	int16,
+	ndarray,
+	prod,
+	unravel_index,
+	uint8,
+	uint32,
+	zeros,
+)
+
 from grid import (
 	Cell,
+	CellArray,
+	Coordinates,
 	Grid,
 	Regioning,
+	Shape,
+)
+from grid.constants import (
+	EMPTY,
+	NO_REGION,
 )
-from keys import number_keys
 from util.enums import AutoName
 
+if TYPE_CHECKING:
+	from grid.solver import (
+		Budget,
+		SolutionCount,
+	)
+
+
+MASK_CACHE = 4096
+
+
+@lru_cache(MASK_CACHE)
+def mask_digits(mask: int) -> tuple[int, ...]:
+	# the digits in a mark mask, as far as its highest bit, so 16x16 and larger grids keep theirs
+	return tuple(n for n in range(mask.bit_length()) if mask >> n & 1)
+
 
 class SudokuCell(Cell):
+	__slots__ = ('index',)
+
 	class Field(str, AutoName):
 		CANDIDATE = auto()
 		COLOR = auto()
@@ -24,25 +71,97 @@ class SudokuCell(Cell):
 		def error(name):
 			return ValueError(f'{name} should be one of Cell.Field literals')
 
-	def __init__(self, grid: ForwardRef('SudokuGrid')):
+	def __init__(self, grid: ForwardRef('SudokuGrid'), index: int):
 		super().__init__(grid)
-		self.candidates = 0
-		self.color = 0
-		self.contingencies = 0
-		self.given = False
-		self.region = None
-		self.value = ''
+		self.index = index
+
+	def __eq__(self, other) -> bool:
+		return isinstance(other, SudokuCell) and other.grid is self.grid and other.index == self.index
+
+	def __hash__(self) -> int:
+		return hash((id(self.grid), self.index))
+
+	@property
+	def key(self) -> int:
+		return self.index
+
+	@property
+	def candidates(self) -> int:
+		return int(self.grid.candidates[self.index])
+
+	@candidates.setter
+	def candidates(self, candidates: int):
+		self.grid.touch('candidates', self.index)
+		self.grid.candidates[self.index] = candidates
+		self.grid.notify(self.index)
+
+	@property
+	def color(self) -> int:
+		return int(self.grid.colors[self.index])
+
+	@color.setter
+	def color(self, color: int):
+		self.grid.touch('colors', self.index)
+		self.grid.colors[self.index] = color
+		self.grid.notify(self.index)
+
+	@property
+	def contingencies(self) -> int:
+		return int(self.grid.contingencies[self.index])
+
+	@contingencies.setter
+	def contingencies(self, contingencies: int):
+		self.grid.touch('contingencies', self.index)
+		self.grid.contingencies[self.index] = contingencies
+		self.grid.notify(self.index)
+
+	@property
+	def given(self) -> bool:
+		return bool(self.grid.given[self.index])
+
+	@given.setter
+	def given(self, given: bool):
+		self.grid.touch('given', self.index)
+		self.grid.given[self.index] = given
+		self.grid.notify(self.index)
+
+	@property
+	def region(self) -> Union[int, None]:
+		region = int(self.grid.regions[self.index])
+		return None if region == NO_REGION else region
+
+	@region.setter
+	def region(self, region: Union[int, None]):
+		self.grid.touch('regions', self.index)
+		self.grid.regions[self.index] = NO_REGION if region is None else region
+		self.grid.notify(self.index)
+
+	@property
+	def value(self) -> Union[int, str]:
+		value = int(self.grid.values[self.index])
+		return '' if value == EMPTY else value
+
+	@value.setter
+	def value(self, value: Union[int, str]):
+		self.grid.touch('values', self.index)
+		self.grid.values[self.index] = EMPTY if value == '' else value
+		self.grid.notify(self.index)
 
 	def set_given(self, value: int):
-		self.value = value
-		self.given = value != ''
+		with self.grid.action():
+			self.value = value
+			self.given = value != ''
 
 	def is_set(self, digit: int, field: Field) -> bool:
 		_field = self.candidates if field == SudokuCell.Field.CANDIDATE else self.contingencies
 		return _field & (1 << digit) > 0
 
+	@staticmethod
+	def digits(mask: int) -> list[int]:
+		return list(mask_digits(mask))
+
 	def convert(self, field: Field) -> list[int]:
-		return [n for n in range(len(number_keys) // 2) if self.is_set(n, field)]
+		return SudokuCell.digits(self.candidates if field == SudokuCell.Field.CANDIDATE else self.contingencies)
 
 	def clear(self):
 		if self.given:
@@ -86,10 +205,176 @@ class SudokuCell(Cell):
 
 
 class SudokuGrid(Grid):
+	# struct of arrays, one flat array per cell attribute, indexed by SudokuCell.index
+	fields = {
+		'values': (int8, EMPTY),
+		'given': (bool_, False),
+		'candidates': (uint32, 0),
+		'contingencies': (uint32, 0),
+		'colors': (uint8, 0),
+		'regions': (int16, NO_REGION),
+	}
 
 	def __init__(
 			self,
 			dimensions: int,
 			regioning: Union[int, Regioning],
+			arrays: Optional[dict[str, ndarray]] = None,
 	):
-		super().__init__(dimensions, regioning, SudokuCell)
+		# `arrays` supplies every field as an existing flat array, e.g. a memory map, so none is allocated
+		self.cell_type = SudokuCell
+		self.journal = None
+		self.listeners = []
+		self.solver = None
+		super().__init__(dimensions, regioning, SudokuCell if arrays is None else None)
+		if arrays is not None:
+			size = regioning if type(regioning) is int else (shape := regioning.shape)[0] * shape[1]
+			self.populate(SudokuCell, (size,) * dimensions, arrays)
+
+	@property
+	def count(self) -> int:
+		return self.cells.size
+
+	def action(self) -> ContextManager:
+		# groups edits into one undo step when a Journal is attached
+		return nullcontext() if self.journal is None else self.journal.action()
+
+	def cell(self, index: int) -> SudokuCell:
+		return self.cell_type(self, index)
+
+	def clear(self, where: ndarray):
+		# SudokuCell.clear on every cell in `where` (flat indices or a mask): each loses only its topmost layer
+		target = self.mask(where) & ~self.given
+		cleared = target.copy()
+		for name, empty in (('values', EMPTY), ('colors', 0), ('contingencies', 0), ('candidates', 0)):
+			field = getattr(self, name)
+			layer = target & (field != empty)
+			self.touch(name, layer)
+			field[layer] = empty
+			target &= ~layer
+		self.notify(flatnonzero(cleared & ~target))
+
+	def convert(self, field: SudokuCell.Field, where: Optional[ndarray] = None) -> list[list[int]]:
+		# SudokuCell.convert for every cell in `where`, or for the whole grid, in flat index order
+		marks = getattr(self, self.marks(field))
+		masks = marks if where is None else marks[self.mask(where)]
+		return [list(mask_digits(mask)) for mask in masks.tolist()]
+
+	def count_solutions(
+			self,
+			limit: Optional[int] = 2,
+			givens_only: bool = True,
+			budget: Optional[Budget] = None,
+	) -> SolutionCount:
+		# the solver is kept between calls so that newly added givens only extend its propagated state
+		from grid.solver import Solver
+		if self.solver is None or self.solver.givens_only != givens_only:
+			self.solver = Solver(self, givens_only)
+		else:
+			self.solver.sync()
+		return self.solver.count(limit, budget)
+
+	def fill_candidates(self, where: Optional[ndarray] = None):
+		# every open cell in `where` gets exactly the digits no peer shows; OR-reduced per unit, then per cell
+		from grid.units import regioning_index
+		index = regioning_index(self.dimensions, self.regioning)
+		bits = (uint32(1) << self.values.clip(0).astype(uint32)) * (self.values > 0)
+		seen = bitwise_or.reduce(bits[index.units], axis=1)
+		seen = bitwise_or.reduceat(seen[index.cell_units], index.unit_pointers[:-1])
+		target = (self.values == EMPTY) & ~self.given
+		if where is not None:
+			target &= self.mask(where)
+		full = ((1 << self.size) - 1) << 1
+		self.touch('candidates', target)
+		self.candidates[target] = full & ~seen[target]
+		self.notify(flatnonzero(target))
+
+	def field(self, name: str) -> ndarray:
+		return getattr(self, name).reshape(self.shape)
+
+	def get_coordinates(self, target: SudokuCell) -> Coordinates:
+		if target.grid is not self:
+			raise KeyError('target cell is not in grid')
+		return tuple(int(i) for i in unravel_index(target.index, self.shape))
+
+	def marks(self, field: SudokuCell.Field) -> Optional[str]:
+		# name of the array holding `field`'s marks; None for fields without marks
+		if field == SudokuCell.Field.CANDIDATE:
+			return 'candidates'
+		if field == SudokuCell.Field.CONTINGENCY:
+			return 'contingencies'
+		if field not in (SudokuCell.Field.COLOR, SudokuCell.Field.GUESS):
+			raise SudokuCell.Field.error('field')
+		return None
+
+	def mask(self, where: ndarray) -> ndarray:
+		# flat boolean copy of `where`, given as flat indices or as a mask of either shape
+		where = asarray(where)
+		if where.dtype == bool_:
+			return where.reshape(-1).copy()
+		mask = zeros(self.count, bool_)
+		mask[where] = True
+		return mask
+
+	def notify(self, where: Union[int, ndarray, None] = None):
+		# a flat index or an array of them; None means any number of cells changed
+		for listener in self.listeners:
+			listener(where)
+		if self.journal is not None:
+			self.journal.changed()
+
+	def populate(self, cell_type: Callable, shape: Shape, arrays: Optional[dict[str, ndarray]] = None):
+		self.cell_type = cell_type
+		count = int(prod(shape))
+		for name, (dtype, fill) in SudokuGrid.fields.items():
+			setattr(self, name, full(count, fill, dtype) if arrays is None else arrays[name])
+		self.cells = CellArray(self, shape)
+
+	def reindex(self):
+		# coordinates follow arithmetically from the flat index, see get_coordinates
+		pass
+
+	def set(self, digit: int, field: SudokuCell.Field, where: ndarray):
+		# SudokuCell.set on every cell in `where` (flat indices or a mask)
+		where = self.mask(where)
+		marks = self.marks(field)
+		if field == SudokuCell.Field.GUESS:
+			where = where & ~self.given
+			self.touch('values', where)
+			self.values[where] = digit
+		elif marks is not None:
+			self.touch(marks, where)
+			getattr(self, marks)[where] |= 1 << digit
+		self.notify(flatnonzero(where))
+
+	def toggle(self, digit: int, field: SudokuCell.Field, where: ndarray):
+		# SudokuCell.toggle on every cell in `where` (flat indices or a mask)
+		where = self.mask(where)
+		marks = self.marks(field)
+		if field == SudokuCell.Field.GUESS:
+			where = where & ~self.given
+			same = where & (self.values == digit)
+			self.touch('values', where)
+			self.values[where] = digit
+			self.values[same] = EMPTY
+		elif marks is not None:
+			self.touch(marks, where)
+			getattr(self, marks)[where] ^= 1 << digit
+		self.notify(flatnonzero(where))
+
+	def touch(self, name: str, where: Union[int, ndarray]):
+		if self.journal is not None:
+			self.journal.touch(name, where)
+
+	def unset(self, digit: int, field: SudokuCell.Field, where: ndarray):
+		# the reverse of set: removes the mark, or the guess if it is `digit`
+		where = self.mask(where)
+		marks = self.marks(field)
+		if field == SudokuCell.Field.GUESS:
+			where = where & ~self.given & (self.values == digit)
+			self.touch('values', where)
+			self.values[where] = EMPTY
+		elif marks is not None:
+			self.touch(marks, where)
+			getattr(self, marks)[where] &= ~(1 << digit)
+		self.notify(flatnonzero(where))
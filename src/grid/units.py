@@ -0,0 +1,166 @@
+from functools import (
+	cached_property,
+	lru_cache,
+)
+from itertools import combinations
+from os import (
+	environ,
+	fdopen,
+	makedirs,
+	path,
+	remove,
+	replace,
+)
+from tempfile import mkstemp
+from typing import Optional
+from zipfile import BadZipFile
+
+from numpy import (
+	arange,
+	argsort,
+	concatenate,
+	cumsum,
+	int32,
+	load,
+	moveaxis,
+	ndarray,
+	ones,
+	savez,
+	sort,
+	split,
+	zeros,
+)
+
+from grid import (
+	Regioning,
+	Shape,
+)
+from grid.constants import UNIT_CACHE
+
+Box = tuple[int, int]
+Lists = list[list[int]]
+VERSION = 1
+
+
+def lines(indices: ndarray) -> list[ndarray]:
+	size = indices.shape[0]
+	return [moveaxis(indices, axis, -1).reshape(-1, size) for axis in range(indices.ndim)]
+
+
+def boxes(indices: ndarray, box: Box) -> list[ndarray]:
+	size = indices.shape[0]
+	rows, columns = box
+	units = []
+	for axes in combinations(range(indices.ndim), 2):
+		planes = moveaxis(indices, axes, (-2, -1))
+		split_planes = planes.reshape(planes.shape[:-2] + (size // rows, rows, size // columns, columns))
+		units.append(moveaxis(split_planes, -3, -2).reshape(-1, size))
+	return units
+
+
+def pointers(counts: ndarray) -> ndarray:
+	return concatenate([zeros(1, int32), cumsum(counts, dtype=int32)])
+
+
+class UnitIndex:
+	# units as a dense (unit, member) array; cell -> units and cell -> peers in CSR form
+
+	def __init__(
+			self,
+			units: ndarray,
+			unit_pointers: ndarray,
+			cell_units: ndarray,
+			peer_pointers: ndarray,
+			peers: ndarray,
+	):
+		self.units = units
+		self.unit_pointers = unit_pointers
+		self.cell_units = cell_units
+		self.peer_pointers = peer_pointers
+		self.peers = peers
+
+	@staticmethod
+	def build(shape: Shape, box: Box) -> 'UnitIndex':
+		size = shape[0]
+		indices = arange(size ** len(shape), dtype=int32).reshape(shape)
+		units = concatenate(lines(indices) + boxes(indices, box)).astype(int32)
+		per_cell = units.size // indices.size
+		cell_units = (argsort(units.ravel(), kind='stable') // size).astype(int32)
+		members = sort(units[cell_units.reshape(-1, per_cell)].reshape(indices.size, -1), axis=1)
+		keep = ones(members.shape, bool)
+		keep[:, 1:] = members[:, 1:] != members[:, :-1]
+		keep &= members != indices.reshape(-1, 1)
+		return UnitIndex(
+			units,
+			pointers(zeros(indices.size, int32) + per_cell),
+			cell_units,
+			pointers(keep.sum(axis=1)),
+			members[keep],
+		)
+
+	@staticmethod
+	def load(file: str) -> 'UnitIndex':
+		with load(file) as data:
+			return UnitIndex(*(data[name] for name in UnitIndex.arrays()))
+
+	@staticmethod
+	def arrays() -> list[str]:
+		return ['units', 'unit_pointers', 'cell_units', 'peer_pointers', 'peers']
+
+	@cached_property
+	def lists(self) -> tuple[Lists, Lists, Lists]:
+		# plain lists are what the pure Python propagation loops index fastest
+		return (
+			self.units.tolist(),
+			[u.tolist() for u in split(self.cell_units, self.unit_pointers[1:-1])],
+			[p.tolist() for p in split(self.peers, self.peer_pointers[1:-1])],
+		)
+
+	@property
+	def count(self) -> int:
+		return self.units.shape[0]
+
+	def peers_of(self, index: int) -> ndarray:
+		return self.peers[self.peer_pointers[index]:self.peer_pointers[index + 1]]
+
+	def save(self, file: str):
+		# a temporary file of its own per writer, so processes sharing the cache never replace each other's
+		descriptor, temporary = mkstemp(suffix='.tmp.npz', dir=path.dirname(file) or '.')
+		try:
+			with fdopen(descriptor, 'wb') as stream:
+				savez(stream, **{name: getattr(self, name) for name in UnitIndex.arrays()})
+			replace(temporary, file)
+		except BaseException:
+			remove(temporary)
+			raise
+
+	def units_of(self, index: int) -> ndarray:
+		return self.units[self.cell_units[self.unit_pointers[index]:self.unit_pointers[index + 1]]]
+
+
+def cache_file(directory: str, shape: Shape, box: Box) -> str:
+	return path.join(directory, f'units-v{VERSION}-{len(shape)}d-{shape[0]}-{box[0]}x{box[1]}.npz')
+
+
+@lru_cache
+def unit_index(shape: Shape, box: Box, cache: Optional[str] = None) -> UnitIndex:
+	if cache is None:
+		cache = environ.get(UNIT_CACHE)
+	if not cache:
+		return UnitIndex.build(shape, box)
+	file = cache_file(cache, shape, box)
+	if path.exists(file):
+		try:
+			return UnitIndex.load(file)
+		except (BadZipFile, EOFError, OSError, KeyError, ValueError):
+			# a truncated or foreign file is a miss and gets rebuilt over
+			pass
+	index = UnitIndex.build(shape, box)
+	makedirs(cache, exist_ok=True)
+	index.save(file)
+	return index
+
+
+def regioning_index(dimensions: int, regioning: Regioning, cache: Optional[str] = None) -> UnitIndex:
+	rows, columns = regioning.shape
+	return unit_index((rows * columns,) * dimensions, (rows, columns), cache)
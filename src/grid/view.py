@@ -0,0 +1,87 @@
+from functools import lru_cache
+from typing import (
+	Optional,
+	TYPE_CHECKING,
+)
+
+from numpy import ndarray
+
+if TYPE_CHECKING:
+	from grid import (
+		Coordinates,
+		Grid,
+	)
+
+PERMUTATION_CACHE = 64
+
+
+def check_coordinates(coordinates: 'Coordinates', dimensions: int):
+	# -1 ('*' in the coordinates box) marks each of the two free axes of a plane
+	if len(coordinates) != dimensions or list(coordinates).count(-1) != 2:
+		raise ValueError('coordinates must have one entry per dimension and exactly 2 free axes')
+
+
+@lru_cache(maxsize=PERMUTATION_CACHE)
+def permutation(dimensions: int, size: int, axes: tuple[int, int]) -> tuple[tuple[int, int], tuple[int, ...]]:
+	# flat-index strides of the two free axes, and the remaining fixed axes in order
+	strides = [size ** (dimensions - 1 - axis) for axis in range(dimensions)]
+	return (strides[axes[0]], strides[axes[1]]), tuple(axis for axis in range(dimensions) if axis not in axes)
+
+
+class PlaneView:
+	# a plane of the grid addressed arithmetically: plane (i, j) is flat index base + i * strides[0] + j * strides[1]
+
+	def __init__(self, grid: 'Grid'):
+		self.grid = grid
+		# flat-index stride of every axis; the grid's shape never changes
+		self.steps = tuple(grid.size ** (grid.dimensions - 1 - axis) for axis in range(grid.dimensions))
+		self.axes = (grid.dimensions - 2, grid.dimensions - 1)
+		self.base = 0
+		self.coordinates = [0] * (grid.dimensions - 2) + [-1, -1]
+		self.fixed = ()
+		self.strides = (0, 0)
+		self.set(self.coordinates)
+
+	@property
+	def cells(self) -> ndarray:
+		# a view of the grid's cell indices, sharing memory; the first axis is the lower free axis
+		return self.grid.cells[tuple(slice(None) if c < 0 else c for c in self.coordinates)]
+
+	def index(self, i: int, j: int) -> int:
+		return self.base + i * self.strides[0] + j * self.strides[1]
+
+	def locate(self, index: int) -> Optional['Coordinates']:
+		# the inverse of index, or None when the cell lies outside the plane
+		size = self.grid.size
+		i, j = index // self.strides[0] % size, index // self.strides[1] % size
+		return (i, j) if self.index(i, j) == index else None
+
+	def locate_all(self, indices: ndarray) -> tuple[ndarray, ndarray]:
+		# locate for an array of flat indices: plane rows and columns of those inside the plane
+		size = self.grid.size
+		i, j = indices // self.strides[0] % size, indices // self.strides[1] % size
+		inside = self.base + i * self.strides[0] + j * self.strides[1] == indices
+		return i[inside], j[inside]
+
+	def move(self, axis: int, step: int = 1):
+		# translate along a fixed axis, wrapping around the grid
+		if self.coordinates[axis] < 0:
+			raise ValueError(f'axis {axis} is not fixed')
+		coordinate = (self.coordinates[axis] + step) % self.grid.size
+		self.base += (coordinate - self.coordinates[axis]) * self.steps[axis]
+		self.coordinates[axis] = coordinate
+
+	def rotate(self, side: int, axis: int, at: int = 0):
+		# free the fixed `axis` in place of free axis `side` (0 or 1), which becomes fixed at `at`
+		coordinates = list(self.coordinates)
+		coordinates[self.axes[side]], coordinates[axis] = at, -1
+		self.set(coordinates)
+
+	def set(self, coordinates: 'Coordinates'):
+		# -1 marks the two free axes; fixed coordinates past the edge are clamped
+		check_coordinates(coordinates, self.grid.dimensions)
+		size, dimensions = self.grid.size, self.grid.dimensions
+		self.coordinates = [c if c < 0 else min(c, size - 1) for c in coordinates]
+		self.axes = tuple(axis for axis, c in enumerate(self.coordinates) if c < 0)
+		self.strides, self.fixed = permutation(dimensions, size, self.axes)
+		self.base = sum(self.coordinates[axis] * self.steps[axis] for axis in self.fixed)
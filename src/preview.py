@@ -0,0 +1,67 @@
+from argparse import ArgumentParser
+from os import (
+	makedirs,
+	path,
+)
+from sys import (
+	exit,
+	stderr,
+	stdin,
+)
+from time import perf_counter
+from typing import Optional
+
+from batch import (
+	parse_puzzle,
+	read_puzzles,
+)
+from rendering import Rendering
+from rendering.export import (
+	PlaneExporter,
+	init_headless,
+)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+	parser = ArgumentParser(description='Render puzzles to PNG preview sheets without a display')
+	parser.add_argument('input', nargs='?', default='-', help='one puzzle per line, text or JSON (default: stdin)')
+	parser.add_argument('-o', '--output', default='.', help='directory for the images (default: current)')
+	parser.add_argument('-s', '--cell-size', type=int, default=30, help='cell size in pixels')
+	parser.add_argument('-f', '--font', default='monospaced', help='system font name')
+	parser.add_argument('-c', '--columns', type=int, default=None, help='planes per row of the sheet')
+	parser.add_argument('-p', '--plane', default=None, help='render only this plane, e.g. 0,*,* as in the game')
+	args = parser.parse_args(argv)
+	init_headless()
+	exporter = PlaneExporter(Rendering(args.cell_size, args.font, max(1, args.cell_size // 16)))
+	coordinates = None
+	if args.plane is not None:
+		coordinates = tuple(int(x) for x in args.plane.replace('*', '-1').split(','))
+	makedirs(args.output, exist_ok=True)
+	source = stdin if args.input == '-' else open(args.input)
+	count = planes = 0
+	start = perf_counter()
+	try:
+		for number, line in read_puzzles(source):
+			try:
+				grid = parse_puzzle(line)
+			except (KeyError, TypeError, ValueError) as error:
+				print(f'line {number}: {error}', file=stderr)
+				continue
+			file = path.join(args.output, f'puzzle-{number}.png')
+			if coordinates is None:
+				exporter.save_montage(grid, file, args.columns)
+				planes += grid.size ** (grid.dimensions - 2)
+			else:
+				exporter.save_plane(grid, coordinates, file)
+				planes += 1
+			count += 1
+	finally:
+		if source is not stdin:
+			source.close()
+	elapsed = perf_counter() - start
+	print(f'{count} puzzles, {planes} planes in {elapsed:.3f}s ({planes / elapsed if elapsed else 0:.1f} planes/s)', file=stderr)
+	return 0
+
+
+if __name__ == '__main__':
+	exit(main())
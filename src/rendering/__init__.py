@@ -1,11 +1,11 @@
 from enum import Enum
-from typing import Union
 
 from pygame import Color
 
-from util.tuple import formula
-
-Size = Union[int, tuple[int, int]]
+from util.tuple import (
+	Size,
+	formula,
+)
 
 
 class Colors(Color, Enum):
@@ -23,9 +23,11 @@ class Rendering:
 			cell_size: int,
 			font: str,
 			width: int,
+			threads: int = 0,
 	):
 		self.cell_size = cell_size
 		self.font = font
+		self.threads = threads
 		self.width = width
 
 	def size(self, scale: Size = (1, 1), margin: Size = (0, 0)) -> tuple[int, int]:
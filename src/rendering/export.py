@@ -0,0 +1,130 @@
+from math import (
+	ceil,
+	sqrt,
+)
+from os import environ
+from struct import pack
+from typing import Optional
+from zlib import (
+	compress,
+	crc32,
+)
+
+from numpy import (
+	asarray,
+	concatenate,
+	frombuffer,
+	ndarray,
+	ndindex,
+	uint8,
+	zeros,
+)
+from pygame import (
+	Surface,
+	font as fonts,
+	image,
+)
+
+from grid import Coordinates
+from grid.constants import EMPTY
+from grid.render import (
+	CellState,
+	SpriteCache,
+)
+from grid.sudoku import SudokuGrid
+from grid.view import check_coordinates
+from rendering import (
+	Colors,
+	Rendering,
+)
+
+PNG_LEVEL = 1
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def encode_png(surface: Surface, level: int = PNG_LEVEL) -> bytes:
+	# pygame's own PNG writer always compresses hard; previews are written far more often than they are kept
+	width, height = surface.get_size()
+	rows = frombuffer(image.tobytes(surface, 'RGB'), uint8).reshape(height, width * 3)
+	raw = concatenate([zeros((height, 1), uint8), rows], axis=1).tobytes()
+
+	def chunk(kind: bytes, data: bytes) -> bytes:
+		return pack('>I', len(data)) + kind + data + pack('>I', crc32(kind + data))
+
+	header = pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+	return PNG_SIGNATURE + chunk(b'IHDR', header) + chunk(b'IDAT', compress(raw, level)) + chunk(b'IEND', b'')
+
+
+def init_headless():
+	# fonts and plain Surfaces need no window; the dummy driver covers anything that still asks for one
+	environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+	fonts.init()
+
+
+def plane_indices(grid: SudokuGrid, coordinates: Coordinates) -> ndarray:
+	# coordinates as in Renderer.set_view: -1 marks the two axes of the plane
+	check_coordinates(coordinates, grid.dimensions)
+	return asarray(grid.cells)[tuple(slice(None) if c < 0 else c for c in coordinates)]
+
+
+def save_png(surface: Surface, file: str, level: int = PNG_LEVEL):
+	with open(file, 'wb') as stream:
+		stream.write(encode_png(surface, level))
+
+
+class PlaneExporter:
+	# draws planes straight from the grid arrays onto plain Surfaces, sharing one sprite cache
+
+	def __init__(self, rendering: Rendering, sprites: Optional[SpriteCache] = None):
+		self.rendering = rendering
+		self.sprites = sprites or SpriteCache(rendering)
+
+	def draw(self, surface: Surface, grid: SudokuGrid, indices: ndarray, topleft: tuple[int, int] = (0, 0)):
+		# the plane's first axis runs along x, as in GridRenderer
+		cell_size = self.rendering.cell_size
+		width, height = indices.shape
+		indices = indices.ravel()
+		values = grid.values[indices].tolist()
+		open_cells = grid.values[indices] == EMPTY
+		candidates = (grid.candidates[indices] * open_cells).tolist()
+		contingencies = (grid.contingencies[indices] * open_cells).tolist()
+		given = grid.given[indices].tolist()
+		colors = grid.colors[indices].tolist()
+		get = self.sprites.get
+		x, y = topleft
+		surface.blits([
+			(
+				get(CellState('' if values[i] == EMPTY else values[i], given[i], candidates[i], contingencies[i], False, colors[i])),
+				(x + i // height * cell_size, y + i % height * cell_size),
+			)
+			for i in range(width * height)
+		], False)
+
+	def montage(self, grid: SudokuGrid, columns: Optional[int] = None, gap: Optional[int] = None) -> Surface:
+		# every plane over the last two axes, tiled in C order of the remaining coordinates
+		size = self.rendering.cell_size * grid.size
+		gap = self.rendering.cell_size // 2 if gap is None else gap
+		outer = (grid.size,) * (grid.dimensions - 2)
+		count = grid.size ** (grid.dimensions - 2)
+		columns = columns or ceil(sqrt(count))
+		rows = ceil(count / columns)
+		surface = Surface((columns * (size + gap) + gap, rows * (size + gap) + gap))
+		surface.fill(Colors.WHITE)
+		cells = asarray(grid.cells)
+		for n, coordinates in enumerate(ndindex(*outer)):
+			topleft = (gap + n % columns * (size + gap), gap + n // columns * (size + gap))
+			self.draw(surface, grid, cells[coordinates], topleft)
+		return surface
+
+	def plane(self, grid: SudokuGrid, coordinates: Coordinates) -> Surface:
+		indices = plane_indices(grid, coordinates)
+		surface = Surface(self.rendering.size(indices.shape))
+		surface.fill(Colors.WHITE)
+		self.draw(surface, grid, indices)
+		return surface
+
+	def save_montage(self, grid: SudokuGrid, file: str, columns: Optional[int] = None):
+		save_png(self.montage(grid, columns), file)
+
+	def save_plane(self, grid: SudokuGrid, coordinates: Coordinates, file: str):
+		save_png(self.plane(grid, coordinates), file)
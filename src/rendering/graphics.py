@@ -1,4 +1,5 @@
 from enum import Enum
+from functools import lru_cache
 from typing import Optional
 
 from pygame import (
@@ -9,6 +10,10 @@ from pygame import (
 	draw,
 	font as fonts,
 )
+from pygame.font import Font
+
+FONT_CACHE = 32
+GLYPH_CACHE = 2048
 
 
 class Center(str, Enum):
@@ -20,7 +25,7 @@ def center(source: Surface, dest: Surface, axes: Optional[Center] = None) -> Rec
 	rect = source.get_rect()
 	rect.center = dest.get_rect().center
 	if axes is not None:
-		exec(f'rect.{axes} = source.get_rect().{axes}')
+		setattr(rect, axes.value, getattr(source.get_rect(), axes.value))
 	return rect
 
 
@@ -32,16 +37,22 @@ def new_surface(size: Optional[int] = 40) -> Surface:
 	return Surface((size, size), SRCALPHA)
 
 
+@lru_cache(FONT_CACHE)
+def load_font(font: str, size: int) -> Font:
+	return fonts.SysFont(font, size)
+
+
+@lru_cache(GLYPH_CACHE)
+def render_glyph(font: str, text: str, size: int, color: tuple[int, int, int, int]) -> Surface:
+	return load_font(font, size).render(text, True, color)
+
+
 def render_text(font: str, text: str, size: int, color: Color) -> Surface:
-	return fonts.SysFont(font, size).render(text, True, color)
+	# the surface is shared with every other caller asking for the same text, so it must only be blitted
+	return render_glyph(font, text, size, tuple(Color(color)))
 
 
 class ModeButton:
-	corner_formulae = [
-		'(m, m)',
-		'(r.w - tr[1].w - m, m)',
-		'(m, r.h - tr[2].h - m)',
-	]
 
 	@staticmethod
 	def __common(
@@ -66,10 +77,9 @@ class ModeButton:
 	def corner(font: str, color: Color) -> Surface:
 		surf = ModeButton.__common(color)
 		text = [render_text(font, str(i + 1), 21, color) for i in range(3)]
-		tr = [t.get_rect() for t in text]
 		m = 6  # m for margin
-		r = surf.get_rect()
-		coord = [eval(f, loc) for loc in (locals(),) for f in ModeButton.corner_formulae]
+		w, h = surf.get_size()
+		coord = [(m, m), (w - text[1].get_width() - m, m), (m, h - text[2].get_height() - m)]
 		surf.blits(zip(text, coord), False)
 		return surf
 
@@ -0,0 +1,44 @@
+from pygame import (
+	Rect,
+	Surface,
+)
+
+from rendering import Colors
+from rendering.graphics import load_font
+from util.instrument import instruments
+
+LINE = 16
+
+
+class Overlay:
+	# rolling p50/p99 of every instrumented span, drawn below the grid while instruments are on
+
+	def __init__(self, rect: Rect, font: str):
+		self.font = font
+		self.rect = rect
+		self.shown = False
+
+	def height(self) -> int:
+		# a line per span seen so far, under the header
+		return (1 + len(instruments.timings)) * LINE
+
+	def draw(self, screen: Surface) -> Rect:
+		# text changes every frame, so it skips the glyph cache to leave that to the grid
+		font = load_font(self.font, LINE - 2)
+		lines = [f'{"span":18}{"p50 ms":>9}{"p99 ms":>9}']
+		for name in sorted(instruments.timings):
+			p50, p99 = instruments.percentiles(name)
+			lines.append(f'{name:18}{p50:9.3f}{p99:9.3f}')
+		if instruments.profiling:
+			lines[0] += '  [profiling]'
+		self.rect.h = len(lines) * LINE
+		screen.fill(Colors.WHITE, self.rect)
+		for i, line in enumerate(lines):
+			screen.blit(font.render(line, True, Colors.BLACK), (self.rect.x, self.rect.y + i * LINE))
+		self.shown = True
+		return self.rect
+
+	def hide(self, screen: Surface) -> Rect:
+		screen.fill(Colors.WHITE, self.rect)
+		self.shown = False
+		return self.rect
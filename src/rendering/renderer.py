@@ -1,37 +1,45 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from typing import (
 	Optional,
 	TYPE_CHECKING,
 	Union,
 )
 
+from numpy import ndarray
 from pygame import (
 	RESIZABLE,
 	Rect,
 	display,
 )
 
-from grid import Grid
 from grid.render import (
 	CellRenderer,
 	GridRenderer,
 )
+from grid.selection import Selection
 from grid.sudoku import (
 	SudokuCell,
 	SudokuGrid,
 )
+from grid.view import PlaneView
 from keys import mode_keys
 from rendering import (
 	Colors,
 	Rendering,
 )
 from rendering.graphics import ModeButton
+from rendering.overlay import (
+	LINE,
+	Overlay,
+)
 from ui.elements import (
 	Button,
 	InputBox,
 	UIElement,
 )
+from util.instrument import instruments
 from util.tuple import formula
 
 if TYPE_CHECKING:
@@ -49,20 +57,32 @@ class Renderer:
 			rendering: Rendering,
 	):
 		self.buttons = []
+		self.buttons_by_name = {}
 		self.coordinates = None
 		self.game = game
 		self.grid = grid
+		self.groups = defaultdict(list)
 		self.input_boxes = []
 		self.loaded = False
 		self.rendering = rendering
 		self.screen = None
+		self.selection = Selection(grid)
 		self.plane = GridRenderer(self, (20, 20), self.grid.size)
 		self.size = formula(lambda a, b, c: sum([a, b, c]), self.plane.rect.size, self.plane.rect.topleft, 100)
-		self.view = Grid(2, self.grid.size)
+		self.view = PlaneView(self.grid)
 		rect = Rect(50, self.plane.rect.bottom + 20, 200, 50)
 		self.input_boxes.append(InputBox(self, 'coordinates', rect, self.set_view, False))
+		self.overlay = Overlay(Rect(rect.right + 20, rect.top - 10, self.size[0] - rect.right - 20, LINE), rendering.font)
 		self.set_view()
 		self.__init_mode_buttons()
+		self.grid.listeners.append(self.changed)
+		self.selection.listeners.append(self.changed)
+
+	@property
+	def dirty(self) -> bool:
+		if not self.loaded or self.plane.dirty or instruments.enabled != self.overlay.shown:
+			return True
+		return any(element.dirty for element in self.elements)
 
 	@property
 	def elements(self) -> list[UIElement]:
@@ -70,18 +90,20 @@ class Renderer:
 
 	@property
 	def mode(self) -> str:
-		return self.__modes('btn.name', 'btn.enabled')[0]
+		return next(btn.name for btn in self.groups['mode'] if btn.enabled)
 
 	@property
 	def modes(self) -> list[str]:
-		return self.__modes('btn.name')
+		return [btn.name for btn in self.groups['mode']]
 
 	@property
 	def selected(self) -> list[SudokuCell]:
-		return [self.get_cell(cell[()]) for cell in self.plane.iterator() if cell[()].selected]
+		return [self.grid.cell(int(index)) for index in self.selection.indices]
 
-	def __buttons(self, condition: Optional[str] = 'True') -> list[Button]:
-		return [btn for btn in self.buttons if eval(condition)]
+	def add_button(self, button: Button):
+		self.buttons.append(button)
+		self.buttons_by_name[button.name] = button
+		self.groups[button.group_name].append(button)
 
 	def __init_mode_buttons(self):
 		rect = [Rect(self.plane.rect.right + 20, 30, 60, 60)]
@@ -105,23 +127,43 @@ class Renderer:
 		radio = Button.Type.RADIO
 		for i in range(4):
 			btn = Button(self, names[i].name, rect[i], icons[i](font, Colors.BLACK), btn_type=radio, group='mode')
-			self.buttons.append(btn)
+			self.add_button(btn)
 		self.get_buttons('mode')[0].enabled = True
 
-	def __modes(self, value: str = 'btn', condition: str = 'True') -> list:
-		return [eval(value) for btn in self.get_buttons('mode') if eval(condition)]
+	def changed(self, where: Union[int, ndarray, None] = None):
+		# listener of the grid and the selection: marks the changed cells that lie in the viewed plane
+		if where is None:
+			self.plane.mark_all()
+		elif isinstance(where, ndarray):
+			self.plane.dirty.update(self.plane.cells[self.view.locate_all(where)].tolist())
+		elif (coordinates := self.view.locate(where)) is not None:
+			self.plane.mark(self.plane.cells[coordinates])
 
 	def get_button(self, name: str) -> Button:
-		return self.__buttons(f'btn.name == "{name}"')[0]
+		return self.buttons_by_name[name]
 
 	def get_buttons(self, group: str) -> list[Button]:
-		return self.__buttons(f'btn.group_name == "{group}"')
+		return self.groups.get(group, [])
 
 	def get_cell(self, source: CellType) -> CellType:
-		grids = [self.view, self.plane]
 		if isinstance(source, CellRenderer):
-			grids.reverse()
-		return grids[1].cells[grids[0].get_coordinates(source)]
+			return self.grid.cell(self.view.index(*self.plane.get_coordinates(source)))
+		coordinates = self.view.locate(source.index)
+		if coordinates is None:
+			raise KeyError('target cell is not in view')
+		return self.plane.cells[coordinates]
+
+	def fit(self):
+		# the overlay gains a line for every new span, and the window grows rather than clip the last ones
+		bottom = self.overlay.rect.top + self.overlay.height()
+		if self.screen is not None and bottom > self.screen.get_height():
+			self.size = (max(self.size[0], self.screen.get_width()), bottom)
+			self.screen = display.set_mode(size=self.size, flags=RESIZABLE)
+			self.repaint()
+
+	def repaint(self):
+		self.loaded = False
+		self.overlay.shown = False
 
 	def set_mode(
 			self,
@@ -144,21 +186,41 @@ class Renderer:
 			s = '0,' * (self.grid.dimensions - 2) + '*,*'
 			self.input_boxes[0].text = s
 		self.coordinates = tuple([int(x) for x in s.replace('*', '-1').split(',')])
-		axes, mapped = [], []
-		for i, c in enumerate(self.coordinates):
-			(mapped if c < 0 else axes).append(i)
-		coord = tuple([min(c, self.plane.size - 1) for c in self.coordinates if c > -1])
-		if len(mapped) != 2:
-			raise ValueError('coordinates must have exactly 2 "*"s')
-		self.view.cells = self.grid.cells.transpose(axes + mapped)[coord]
+		self.view.set(self.coordinates)
+		self.plane.mark_all()
 
 	def tick(self):
+		# after the first frame only changed cells and elements are drawn and pushed to the display
+		if instruments.enabled:
+			self.fit()
 		if not self.loaded:
-			self.screen = display.set_mode(size=self.size, flags=RESIZABLE)
+			# a window resized or exposed by the system keeps its surface but needs all of it drawn again
+			self.screen = display.set_mode(size=self.size, flags=RESIZABLE) if self.screen is None else display.get_surface()
+			self.plane.render()
+			self.screen.fill(Colors.WHITE)
+			self.screen.blit(self.plane.surface, self.plane.rect)
+			for element in self.elements:
+				element.draw(self.screen, self.rendering.font)
+				element.dirty = False
+			display.flip()
 			self.loaded = True
-		self.plane.render()
-		self.screen.fill(Colors.WHITE)
-		self.screen.blit(self.plane.surface, self.plane.rect)
-		for element in self.elements:
-			element.draw(self.screen, self.rendering.font)
-		display.flip()
+			return
+		rects = []
+		with instruments.span('composite'):
+			for rect in self.plane.render():
+				self.screen.blit(self.plane.surface, rect, rect.move(-self.plane.rect.x, -self.plane.rect.y))
+				rects.append(rect)
+			for element in self.elements:
+				if element.dirty:
+					previous = element.rect.copy()
+					self.screen.fill(Colors.WHITE, previous)
+					element.draw(self.screen, self.rendering.font)
+					element.dirty = False
+					rects.append(previous.union(element.rect))
+			if instruments.enabled:
+				rects.append(self.overlay.draw(self.screen))
+			elif self.overlay.shown:
+				rects.append(self.overlay.hide(self.screen))
+		if rects:
+			with instruments.span('display.update'):
+				display.update(rects)
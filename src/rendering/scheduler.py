@@ -0,0 +1,60 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import (
+	Callable,
+	Iterable,
+	NamedTuple,
+)
+
+FRAME_HISTORY = 120
+POOL_BATCH = 64
+
+
+class FrameTimes(NamedTuple):
+	frames: int
+	cells: int
+	last: float
+	mean: float
+	worst: float
+
+
+class RenderScheduler:
+	# threads 0 renders in the calling thread; smaller batches than `batch` are always rendered there too
+
+	def __init__(self, threads: int = 0, batch: int = POOL_BATCH, history: int = FRAME_HISTORY):
+		self.batch = batch
+		self.cells = 0
+		self.executor = ThreadPoolExecutor(threads) if threads > 0 else None
+		self.frames = 0
+		self.threads = threads
+		self.times = deque(maxlen=history)
+
+	@property
+	def metrics(self) -> FrameTimes:
+		times = self.times
+		if not times:
+			return FrameTimes(self.frames, self.cells, 0.0, 0.0, 0.0)
+		return FrameTimes(self.frames, self.cells, times[-1], sum(times) / len(times), max(times))
+
+	def record(self, seconds: float, cells: int = 0):
+		self.frames += 1
+		self.cells += cells
+		self.times.append(seconds)
+
+	def run(self, render: Callable, items: Iterable):
+		# returns once every item is rendered, so callers composite complete frames
+		items = list(items)
+		start = perf_counter()
+		if self.executor is None or len(items) < self.batch:
+			for item in items:
+				render(item)
+		else:
+			for _ in self.executor.map(render, items):
+				pass
+		self.record(perf_counter() - start, len(items))
+
+	def shutdown(self):
+		if self.executor is not None:
+			self.executor.shutdown(cancel_futures=True)
+			self.executor = None
@@ -47,6 +47,7 @@ class UIElement(EventHandler):
 	):
 		super().__init__()
 		self.callback = callback
+		self.dirty = True
 		self.name = name
 		self.rect = rect
 		self.renderer = renderer
@@ -83,14 +84,13 @@ class Button(UIElement):
 
 	@property
 	def group(self) -> list[Button]:
-		return [btn for btn in self.renderer.buttons if btn.group_name is self.group_name]
+		return self.renderer.get_buttons(self.group_name)
 
 	@event_handler(MOUSEBUTTONDOWN)
-	def click(self, event: Event):
-		if not self.rect.collidepoint(event.pos):
-			return
+	def click(self, _: Event):
 		if self.type == Button.Type.TOGGLE:
 			self.enabled = not self.enabled
+			self.dirty = True
 		elif self.type == Button.Type.RADIO:
 			self.enable()
 		if self.callback is not None:
@@ -105,8 +105,10 @@ class Button(UIElement):
 
 	def enable(self):
 		for btn in self.group:
+			btn.dirty = btn.dirty or btn.enabled
 			btn.enabled = False
 		self.enabled = True
+		self.dirty = True
 
 
 class InputBox(UIElement):
@@ -131,19 +133,24 @@ class InputBox(UIElement):
 	def color(self):
 		return Colors.SELECTED if self.active else Colors.WHITE
 
+	def blur(self, _: Event):
+		if not self.active:
+			return
+		self.active = False
+		self.dirty = True
+		if self.callback is not None:
+			self.callback(self.text)
+
 	@event_handler(MOUSEBUTTONDOWN)
-	def click(self, event: Event):
-		if self.rect.collidepoint(event.pos):
-			self.active = not self.active
-		else:
-			self.active = False
-			if self.callback is not None:
-				self.callback(self.text)
+	def click(self, _: Event):
+		self.active = not self.active
+		self.dirty = True
 
 	@event_handler(KEYDOWN)
 	def key_press(self, event: Event):
 		if not self.active:
 			return
+		self.dirty = True
 		if event.key in [K_RETURN, K_KP_ENTER]:
 			self.callback(self.text)
 			if self.reset:
@@ -158,7 +165,10 @@ class InputBox(UIElement):
 
 	def draw(self, screen: Surface, font: str):
 		txt_surface = render_text(font, self.text, 50, Colors.BLACK)
-		self.rect.w = max(200, txt_surface.get_width() + 10)
+		width = max(200, txt_surface.get_width() + 10)
+		if width != self.rect.w:
+			self.rect.w = width
+			self.renderer.game.dispatcher.place(self, self.rect)
 		background = Surface(self.rect.size)
 		background.fill(self.color)
 		background.blit(txt_surface, (5, 5))
@@ -0,0 +1,108 @@
+from collections import (
+	defaultdict,
+	deque,
+)
+from contextlib import nullcontext
+from cProfile import Profile
+from json import dump
+from os import (
+	environ,
+	getpid,
+	path,
+)
+from threading import get_ident
+from time import (
+	perf_counter_ns,
+	strftime,
+)
+from typing import (
+	ContextManager,
+	Optional,
+)
+
+# set to anything but 0 to start with timers on; dumps go to PROFILE_DIR, or the working directory
+PROFILE = 'HDPP_PROFILE'
+PROFILE_DIR = 'HDPP_PROFILE_DIR'
+HISTORY = 512
+TRACE_EVENTS = 200_000
+disabled = nullcontext()
+
+
+class Span:
+	__slots__ = ('instruments', 'name', 'start')
+
+	def __init__(self, instruments: 'Instruments', name: str):
+		self.instruments = instruments
+		self.name = name
+		self.start = 0
+
+	def __enter__(self):
+		self.start = perf_counter_ns()
+
+	def __exit__(self, *_):
+		self.instruments.record(self.name, self.start, perf_counter_ns())
+
+
+class Instruments:
+	# rolling per-name timings for the overlay, plus a bounded event log for Chrome's trace viewer
+
+	def __init__(self, enabled: bool = False):
+		self.enabled = enabled
+		self.events = deque(maxlen=TRACE_EVENTS)
+		self.profile: Optional[Profile] = None
+		self.timings = defaultdict(lambda: deque(maxlen=HISTORY))
+
+	@property
+	def profiling(self) -> bool:
+		return self.profile is not None
+
+	def dump_trace(self, file: str):
+		pid = getpid()
+		with open(file, 'w') as stream:
+			dump({'traceEvents': [
+				{'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3, 'pid': pid, 'tid': thread}
+				for name, start, duration, thread in self.events
+			]}, stream)
+
+	def file(self, suffix: str) -> str:
+		return path.join(environ.get(PROFILE_DIR, '.'), f'hdpp-{strftime("%Y%m%d-%H%M%S")}{suffix}')
+
+	def percentiles(self, name: str) -> tuple[float, float]:
+		# p50 and p99 in milliseconds
+		times = sorted(self.timings[name])
+		if not times:
+			return 0.0, 0.0
+		return times[len(times) // 2] / 1e6, times[min(len(times) - 1, len(times) * 99 // 100)] / 1e6
+
+	def record(self, name: str, start: int, end: int):
+		self.timings[name].append(end - start)
+		self.events.append((name, start, end - start, get_ident()))
+
+	def span(self, name: str) -> ContextManager:
+		return Span(self, name) if self.enabled else disabled
+
+	def start_profile(self):
+		if self.profile is None:
+			self.profile = Profile()
+			self.profile.enable()
+
+	def stop_profile(self) -> list[str]:
+		# writes the cProfile stats and the trace gathered so far; returns the files written
+		files = []
+		if self.profile is not None:
+			self.profile.disable()
+			files.append(self.file('.prof'))
+			self.profile.dump_stats(files[-1])
+			self.profile = None
+		if self.events:
+			files.append(self.file('.trace.json'))
+			self.dump_trace(files[-1])
+		return files
+
+	def toggle(self):
+		self.enabled = not self.enabled
+		if not self.enabled:
+			self.timings.clear()
+
+
+instruments = Instruments(environ.get(PROFILE, '0') not in ('', '0'))
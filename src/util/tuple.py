@@ -3,6 +3,7 @@ from typing import (
 	Union,
 )
 
+Size = Union[int, tuple[int, int]]
 TupleAble = Union[
 	int,
 	list,
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import unittest
+from io import StringIO
+
+from batch import (
+	read_puzzles,
+	solve_all,
+)
+
+PUZZLES = '''# 4x4x4, unique
+3 2x2 .............................23.......2..4.......4...........3..
+3 2x2 ................................................................
+
+3 2x2 1.1.............................................................
+3 2x2 12
+'''
+
+
+class TestBatch(unittest.TestCase):
+
+	def test_solve_all(self):
+		results = list(solve_all(read_puzzles(StringIO(PUZZLES))))
+		self.assertEqual([r['line'] for r in results], [2, 3, 5, 6])
+		unique, empty, invalid, short = results
+		self.assertTrue(unique['unique'])
+		self.assertEqual(len(unique['solution']), len('3 2x2 ') + 64)
+		self.assertEqual(empty['solutions'], 2)
+		self.assertFalse(empty['unique'])
+		self.assertFalse(invalid['valid'])
+		self.assertEqual(invalid['solutions'], 0)
+		self.assertIsNone(invalid['grade'])
+		self.assertIn('error', short)
+
+	def test_limit(self):
+		# a count stopped at one solution cannot tell whether the puzzle is unique
+		results = list(solve_all(read_puzzles(StringIO(PUZZLES)), limit=1))
+		unique, empty = results[:2]
+		self.assertIsNone(unique['unique'])
+		self.assertIsNone(empty['unique'])
+		self.assertEqual(empty['solutions'], 1)
+		self.assertIn(unique['grade'], ('propagation', 'search'))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from pygame import (
+	KEYDOWN,
+	K_a,
+	MOUSEBUTTONDOWN,
+	Rect,
+)
+from pygame.event import Event
+
+from event import (
+	Dispatcher,
+	EventHandler,
+	event_handler,
+)
+
+
+class Recorder(EventHandler):
+
+	def __init__(self):
+		super().__init__()
+		self.blurred = 0
+		self.clicks = 0
+		self.keys = 0
+
+	def blur(self, _: Event):
+		self.blurred += 1
+
+	@event_handler(MOUSEBUTTONDOWN)
+	def click(self, _: Event):
+		self.clicks += 1
+
+	@event_handler(KEYDOWN)
+	def key_press(self, _: Event):
+		self.keys += 1
+
+
+class TestDispatcher(unittest.TestCase):
+
+	def test_routing(self):
+		dispatcher = Dispatcher()
+		left, right, anywhere = Recorder(), Recorder(), Recorder()
+		dispatcher.add(left, Rect(0, 0, 100, 100))
+		dispatcher.add(right, Rect(100, 0, 100, 100))
+		dispatcher.add(anywhere)
+		dispatcher.dispatch(Event(MOUSEBUTTONDOWN, pos=(150, 50), button=1))
+		dispatcher.dispatch(Event(KEYDOWN, key=K_a))
+		self.assertEqual((left.clicks, right.clicks, anywhere.clicks), (0, 1, 1))
+		self.assertEqual((left.keys, right.keys, anywhere.keys), (1, 1, 1))
+		# only the element clicked last is blurred, by a click outside it
+		self.assertEqual((left.blurred, right.blurred), (0, 0))
+		dispatcher.dispatch(Event(MOUSEBUTTONDOWN, pos=(50, 50), button=1))
+		self.assertEqual((left.blurred, right.blurred), (0, 1))
+		dispatcher.dispatch(Event(MOUSEBUTTONDOWN, pos=(50, 150), button=1))
+		self.assertEqual((left.blurred, right.blurred), (1, 1))
+		dispatcher.place(left, Rect(120, 0, 10, 10))
+		dispatcher.dispatch(Event(MOUSEBUTTONDOWN, pos=(125, 5), button=1))
+		self.assertEqual((left.clicks, right.clicks), (2, 2))
+
+
+if __name__ == '__main__':
+	unittest.main()
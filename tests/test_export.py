@@ -0,0 +1,39 @@
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+from pygame import image
+
+from grid import Regioning
+from grid.sudoku import SudokuGrid
+from rendering import (
+	Colors,
+	Rendering,
+)
+from rendering.export import (
+	PlaneExporter,
+	init_headless,
+)
+
+
+class TestExport(unittest.TestCase):
+
+	def test_plane_and_montage(self):
+		init_headless()
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		grid.cells[1, 2, 3].set_given(4)
+		exporter = PlaneExporter(Rendering(20, 'monospaced', 2))
+		self.assertEqual(exporter.plane(grid, (1, -1, -1)).get_size(), (80, 80))
+		self.assertEqual(exporter.montage(grid, columns=4, gap=0).get_size(), (320, 80))
+		self.assertRaises(ValueError, exporter.plane, grid, (1, 2, -1))
+		with TemporaryDirectory() as directory:
+			file = path.join(directory, 'plane.png')
+			exporter.save_plane(grid, (-1, -1, 3), file)
+			loaded = image.load(file)
+			self.assertEqual(loaded.get_size(), (80, 80))
+			self.assertEqual(loaded.get_at((10, 10)), Colors.WHITE)
+			self.assertEqual(len(exporter.sprites), 2)
+
+
+if __name__ == '__main__':
+	unittest.main()
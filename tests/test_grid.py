@@ -1,21 +1,31 @@
 from __future__ import annotations
 
 import unittest
+from os import listdir
+from tempfile import TemporaryDirectory
 
 import pygame as pg
 
 from grid import (
 	Cell,
+	Grid,
 	Regioning,
 )
-from grid.sudoku import SudokuGrid
+from grid.constants import EMPTY
+from grid.journal import Journal
+from grid.selection import Selection
+from grid.sudoku import (
+	SudokuCell,
+	SudokuGrid,
+)
+from grid.view import PlaneView
 from rendering import Rendering
 
 
 class TestGrid(unittest.TestCase):
 	pg.init()
 	region_data = Regioning()
-	region_data._size = (2, 2)
+	region_data.shape = (2, 2)
 	rendering = Rendering(50, 'monospaced', 3)
 	grid = SudokuGrid(dimensions=3, regioning=region_data)
 
@@ -32,6 +42,130 @@ class TestGrid(unittest.TestCase):
 	def test_cell(self):
 		self.assertIsInstance(self.grid.cells[0, 0, 0], Cell)
 
+	def test_coordinates(self):
+		self.assertEqual(self.grid.get_coordinates(self.grid.cells[1, 2, 3]), (1, 2, 3))
+		view = Grid(2, self.grid.size, cells=self.grid.cells.transpose(2, 0, 1)[3])
+		self.assertEqual(view.get_coordinates(self.grid.cells[1, 2, 3]), (1, 2))
+		self.assertRaises(KeyError, view.get_coordinates, self.grid.cells[1, 2, 0])
+
+	def test_plane_view(self):
+		grid = SudokuGrid(4, Regioning(shape=(2, 2)))
+		view = PlaneView(grid)
+		view.set((1, -1, 2, -1))
+		self.assertTrue((view.cells == grid.cells[1, :, 2, :]).all())
+		self.assertEqual(view.index(3, 1), grid.cells[1, 3, 2, 1].index)
+		self.assertEqual(view.locate(grid.cells[1, 3, 2, 1].index), (3, 1))
+		self.assertIsNone(view.locate(grid.cells[0, 3, 2, 1].index))
+		view.move(2, 3)
+		self.assertTrue((view.cells == grid.cells[1, :, 1, :]).all())
+		view.rotate(0, 0, 2)
+		self.assertEqual(view.coordinates, [-1, 2, 1, -1])
+		self.assertEqual(view.index(3, 1), grid.cells[3, 2, 1, 1].index)
+		self.assertRaises(ValueError, view.move, 0)
+		self.assertRaises(ValueError, view.set, (0, 0, 0, -1))
+
+
+class TestSelection(unittest.TestCase):
+
+	def test_bulk_edits(self):
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		grid.cells[0, 0, 0].set_given(1)
+		selection = Selection(grid)
+		selection.mask[0] = True
+		grid.toggle(2, SudokuCell.Field.GUESS, selection.flat)
+		grid.toggle(3, SudokuCell.Field.CANDIDATE, selection.flat)
+		self.assertEqual(grid.cells[0, 0, 0].value, 1)
+		self.assertEqual((grid.values == 2).sum(), 15)
+		selection.select_digit(3)
+		self.assertEqual(selection.count, 16)
+		grid.clear(selection.flat)
+		self.assertEqual((grid.values == 2).sum(), 0)
+		self.assertEqual(grid.cells[0, 1, 1].candidates, 1 << 3)
+		grid.clear(selection.mask)
+		self.assertEqual(grid.candidates.nonzero()[0].tolist(), [0])
+
+	def test_notifications(self):
+		# listeners hear only about the cells that changed, so renderers can skip the rest
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		selection = Selection(grid)
+		heard = []
+		grid.listeners.append(lambda where: heard.append(list(where)))
+		selection.listeners.append(lambda where: heard.append(list(where)))
+		selection.select([5, 6])
+		selection.add([6, 7])
+		grid.toggle(2, SudokuCell.Field.GUESS, selection.flat)
+		grid.clear([6, 9])
+		self.assertEqual(heard, [[5, 6], [7], [5, 6, 7], [6]])
+
+	def test_fill_candidates(self):
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		grid.cells[0, 0, 0].set_given(1)
+		grid.cells[0, 1, 1].set_given(2)
+		grid.fill_candidates()
+		self.assertEqual(grid.cells[0, 0, 0].candidates, 0)
+		self.assertEqual(grid.convert(SudokuCell.Field.CANDIDATE, [1, 4, 17]), [[3, 4], [3, 4], [3, 4]])
+		self.assertEqual(grid.cells[3, 3, 3].convert(SudokuCell.Field.CANDIDATE), [1, 2, 3, 4])
+
+
+class TestJournal(unittest.TestCase):
+
+	def test_undo_redo(self):
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		journal = Journal(grid)
+		grid.cells[0, 0, 0].set_given(1)
+		grid.toggle(2, SudokuCell.Field.CANDIDATE, [1, 2, 3])
+		with journal.action():
+			grid.cells[0, 0, 1].value = 3
+			grid.cells[0, 0, 1].value = 4
+			grid.cells[0, 0, 2].candidates = 0
+		self.assertEqual(len(journal.undos), 3)
+		self.assertTrue(journal.undo())
+		self.assertEqual((grid.cells[0, 0, 1].value, grid.cells[0, 0, 2].candidates), ('', 1 << 2))
+		self.assertTrue(journal.undo())
+		self.assertEqual(grid.candidates.sum(), 0)
+		self.assertTrue(journal.redo())
+		self.assertEqual(grid.candidates[[1, 2, 3]].tolist(), [1 << 2] * 3)
+		self.assertTrue(journal.undo())
+		self.assertTrue(journal.undo())
+		self.assertFalse(journal.undo())
+		self.assertEqual((grid.values.max(), grid.given.sum()), (EMPTY, 0))
+		self.assertTrue(journal.redo())
+		grid.cells[1, 1, 1].value = 2
+		self.assertFalse(journal.redo())
+
+	def test_spill(self):
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		with TemporaryDirectory() as directory:
+			journal = Journal(grid, limit=16, spill=directory)
+			for index in range(8):
+				grid.cell(index).value = 1 + index % 4
+			self.assertTrue(listdir(directory))
+			while journal.undo():
+				pass
+			self.assertEqual(grid.values.max(), EMPTY)
+			self.assertFalse(listdir(directory))
+		forgetful = Journal(grid, limit=16)
+		for index in range(8):
+			grid.cell(index).value = 1
+		self.assertLess(len(forgetful.undos), 8)
+
+	def test_redo_limit(self):
+		# redone actions count against the limit, and spill, like new ones
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		with TemporaryDirectory() as directory:
+			journal = Journal(grid, limit=16, spill=directory)
+			for index in range(8):
+				grid.cell(index).value = 1 + index % 4
+			while journal.undo():
+				pass
+			while journal.redo():
+				pass
+			self.assertLessEqual(journal.nbytes, 16)
+			self.assertTrue(listdir(directory))
+			while journal.undo():
+				pass
+			self.assertEqual(grid.values.max(), EMPTY)
+
 
 if __name__ == '__main__':
 	unittest.main()
@@ -0,0 +1,207 @@
+import unittest
+from asyncio import (
+	gather,
+	run,
+	sleep,
+)
+
+from threading import get_ident
+from time import sleep as pause
+
+from pygame import (
+	Color,
+	KEYDOWN,
+	QUIT,
+	VIDEORESIZE,
+	init,
+)
+from pygame.event import (
+	Event,
+	post,
+)
+
+from game import Game
+from grid import Regioning
+from grid.render import (
+	CellState,
+	PencilMarks,
+	SpriteCache,
+)
+from grid.sudoku import (
+	SudokuCell,
+	SudokuGrid,
+)
+from keys import number_keys
+from rendering import (
+	Colors,
+	Rendering,
+)
+from rendering.export import init_headless
+from rendering.graphics import (
+	FONT_CACHE,
+	GLYPH_CACHE,
+	load_font,
+	render_glyph,
+	render_text,
+)
+from rendering.overlay import LINE
+from rendering.scheduler import RenderScheduler
+from util.instrument import instruments
+
+
+class TestRenderer(unittest.TestCase):
+
+	def setUp(self):
+		init_headless()
+		init()
+		self.game = Game(SudokuGrid(3, Regioning(False, (3, 3))), Rendering(30, 'monospaced', 3))
+		self.renderer = self.game.renderer
+		self.renderer.tick()
+
+	def test_dirty_cells(self):
+		# one digit on one selected cell renders that cell alone
+		metrics = self.renderer.plane.scheduler.metrics
+		self.assertEqual(metrics.cells, 81)
+		self.renderer.selection.set(10, True)
+		self.game.dispatch(Event(KEYDOWN, key=number_keys[5], mod=0, unicode='5'))
+		self.renderer.tick()
+		self.assertEqual(self.renderer.plane.scheduler.metrics.cells, 82)
+		self.assertEqual(self.game.grid.cell(10).value, 5)
+		self.assertFalse(self.renderer.dirty)
+
+	def test_repaint(self):
+		self.game.dispatch(Event(VIDEORESIZE, size=(400, 400), w=400, h=400))
+		self.assertTrue(self.renderer.dirty)
+		self.renderer.tick()
+		self.assertTrue(self.renderer.loaded)
+		self.assertFalse(self.renderer.dirty)
+
+	def test_shared_sprites(self):
+		# a blank plane is 81 cells in one state, drawn once
+		plane = self.renderer.plane
+		self.assertEqual(len(plane.sprites), 1)
+		self.assertEqual(len({id(cell.background) for cell in plane.cells.flat}), 1)
+		self.renderer.selection.set(10, True)
+		self.renderer.tick()
+		self.assertEqual(len(plane.sprites), 2)
+
+	def test_sprite_eviction(self):
+		sprites = SpriteCache(self.renderer.rendering, 2)
+		states = [CellState(digit, False, 0, 0, False, 0) for digit in (1, 2, 3)]
+		first = sprites.get(states[0])
+		sprites.get(states[1])
+		self.assertIs(sprites.get(states[0]), first)
+		sprites.get(states[2])
+		# the least recently used state goes, so the one just touched stays
+		self.assertEqual(list(sprites.sprites), [states[0], states[2]])
+		self.assertIs(sprites.get(states[0]), first)
+
+	def test_shared_loop(self):
+		# waiting for input or for the next frame leaves the asyncio loop to other tasks
+		ticks = []
+
+		async def other():
+			while self.game.running:
+				ticks.append(None)
+				await sleep(0.01)
+
+		async def quit_later():
+			await sleep(0.2)
+			post(Event(QUIT))
+
+		async def session():
+			await gather(self.game.run(), other(), quit_later())
+
+		run(session())
+		self.assertFalse(self.game.running)
+		self.assertGreaterEqual(len(ticks), 10)
+
+	def test_overlay(self):
+		# a line for every span, all on screen, in a window that grows to fit them
+		height = self.renderer.screen.get_height()
+		instruments.toggle()
+		try:
+			for name in 'abcdefghij':
+				with instruments.span(name):
+					pass
+			self.renderer.tick()
+			self.renderer.tick()
+		finally:
+			instruments.toggle()
+		overlay = self.renderer.overlay
+		self.assertTrue(overlay.shown)
+		self.assertGreaterEqual(overlay.rect.h, 11 * LINE)
+		self.assertLessEqual(overlay.rect.bottom, self.renderer.screen.get_height())
+		self.assertGreater(self.renderer.screen.get_height(), height)
+
+
+class TestRenderScheduler(unittest.TestCase):
+
+	def test_pool(self):
+		# a batch as large as `batch` goes to the pool, and run returns only when all of it is done
+		scheduler = RenderScheduler(threads=2, batch=4)
+		rendered = {}
+
+		def render(item: int):
+			pause(0.01)
+			rendered[item] = get_ident()
+
+		try:
+			scheduler.run(render, range(8))
+			self.assertEqual(sorted(rendered), list(range(8)))
+			self.assertNotIn(get_ident(), rendered.values())
+			rendered.clear()
+			scheduler.run(render, range(3))
+			self.assertEqual(set(rendered.values()), {get_ident()})
+		finally:
+			scheduler.shutdown()
+
+	def test_metrics(self):
+		scheduler = RenderScheduler(history=2)
+		self.assertEqual(scheduler.metrics, (0, 0, 0.0, 0.0, 0.0))
+		for seconds, cells in ((0.004, 3), (0.001, 1), (0.002, 2)):
+			scheduler.record(seconds, cells)
+		# the counters cover every frame, the times only the last `history`
+		metrics = scheduler.metrics
+		self.assertEqual((metrics.frames, metrics.cells, metrics.last, metrics.worst), (3, 6, 0.002, 0.002))
+		self.assertAlmostEqual(metrics.mean, 0.0015)
+
+
+class TestPencilMarks(unittest.TestCase):
+
+	def test_layout(self):
+		# a 16x16 grid can mark all sixteen digits, past the ten fixed corner spots
+		self.assertEqual(SudokuCell.digits((1 << 17) - 2), list(range(1, 17)))
+		positions = PencilMarks.layout((50, 50), (6, 8), 16, 5)
+		self.assertEqual(len(set(positions)), 16)
+		for x, y in positions:
+			self.assertTrue(5 <= x <= 50 - 5 - 6 and 5 <= y <= 50 - 5 - 8)
+		self.assertEqual(len(PencilMarks.layout((50, 50), (6, 8), 10, 5)), 10)
+
+
+class TestGraphics(unittest.TestCase):
+
+	def setUp(self):
+		init_headless()
+		render_glyph.cache_clear()
+
+	def test_shared_glyphs(self):
+		# a Colors member and an equal plain Color name the same glyph
+		glyph = render_text('monospaced', '7', 30, Colors.BLACK)
+		self.assertIs(render_text('monospaced', '7', 30, Color(0, 0, 0)), glyph)
+		self.assertIs(render_text('monospaced', '7', 30, Colors.BLACK), glyph)
+		self.assertIsNot(render_text('monospaced', '7', 30, Colors.PENCIL), glyph)
+		self.assertEqual(render_glyph.cache_info().currsize, 2)
+		self.assertIs(load_font('monospaced', 30), load_font('monospaced', 30))
+		self.assertEqual(load_font.cache_info().maxsize, FONT_CACHE)
+
+	def test_bound(self):
+		first = render_text('monospaced', '0', 10, Colors.BLACK)
+		for n in range(1, GLYPH_CACHE + 1):
+			render_text('monospaced', str(n), 10, Colors.BLACK)
+		self.assertEqual(render_glyph.cache_info().currsize, GLYPH_CACHE)
+		self.assertIsNot(render_text('monospaced', '0', 10, Colors.BLACK), first)
+
+
+if __name__ == '__main__':
+	unittest.main()
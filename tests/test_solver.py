@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import unittest
+from os import (
+	listdir,
+	path,
+)
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from numpy import (
+	arange,
+	random,
+	sort,
+)
+
+from grid import Regioning
+from grid.affine import pattern
+from grid.cover import (
+	Budget,
+	ExactCover,
+)
+from grid.generator import (
+	PuzzleGenerator,
+	shuffle,
+)
+from grid.parallel import ParallelSearch
+from grid.solver import Solver
+from grid.sudoku import SudokuGrid
+from grid.units import (
+	UnitIndex,
+	cache_file,
+	regioning_index,
+	unit_index,
+)
+
+
+def solved(grid: SudokuGrid) -> bool:
+	units = regioning_index(grid.dimensions, grid.regioning).units
+	return bool((sort(grid.values[units], axis=1) == arange(1, grid.size + 1)).all())
+
+
+class TestSolver(unittest.TestCase):
+
+	def test_empty(self):
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		solver = Solver(grid)
+		self.assertTrue(solver.solve())
+		self.assertTrue(solved(grid))
+
+	def test_units(self):
+		solver = Solver(SudokuGrid(3, Regioning(shape=(3, 3))))
+		self.assertEqual(len(solver.units), 3 * 81 + 3 * 81)
+		self.assertEqual(len(solver.cell_units[0]), 6)
+		self.assertEqual(len(solver.peers[0]), 3 * 8 + 3 * 4)
+
+	def test_unit_cache(self):
+		built = UnitIndex.build((4, 4, 4), (2, 2))
+		with TemporaryDirectory() as cache:
+			saved = unit_index((4, 4, 4), (2, 2), cache)
+			unit_index.cache_clear()
+			loaded = unit_index((4, 4, 4), (2, 2), cache)
+		self.assertIsNot(saved, loaded)
+		for name in UnitIndex.arrays():
+			self.assertTrue((getattr(built, name) == getattr(loaded, name)).all())
+		self.assertEqual(sorted(built.peers_of(0).tolist()), built.peers_of(0).tolist())
+
+	def test_unit_cache_damaged(self):
+		with TemporaryDirectory() as cache:
+			file = cache_file(cache, (4, 4, 4), (2, 2))
+			unit_index((4, 4, 4), (2, 2), cache)
+			with open(file, 'rb') as stream:
+				data = stream.read()
+			with open(file, 'wb') as stream:
+				stream.write(data[:len(data) // 2])
+			unit_index.cache_clear()
+			rebuilt = unit_index((4, 4, 4), (2, 2), cache)
+			self.assertEqual(rebuilt.count, UnitIndex.load(file).count)
+			self.assertEqual(listdir(cache), [path.basename(file)])
+
+	def test_puzzle(self):
+		grid = SudokuGrid(3, Regioning(shape=(3, 3)))
+		solution = pattern(3, 3).ravel()
+		givens = random.default_rng(0).random(grid.count) < 0.2
+		grid.values[givens] = solution[givens]
+		grid.given[givens] = True
+		solver = Solver(grid, givens_only=True)
+		self.assertTrue(solver.solve())
+		self.assertTrue(solved(grid))
+		self.assertTrue((grid.values[givens] == solution[givens]).all())
+
+	def test_sparse(self):
+		# a blank grid and a few givens of a shuffled pattern both stall fewest-candidates-first search
+		for givens in (0, 36):
+			rng = random.default_rng(givens)
+			grid = SudokuGrid(3, Regioning(shape=(3, 3)))
+			solution = shuffle(pattern(3, 3), (3, 3), rng).ravel()
+			cells = rng.choice(grid.count, givens, replace=False)
+			grid.values[cells] = solution[cells]
+			grid.given[cells] = True
+			budget = Budget(seconds=10)
+			self.assertTrue(Solver(grid, givens_only=True).solve(budget))
+			self.assertFalse(budget.exhausted)
+			self.assertTrue(solved(grid))
+			self.assertTrue((grid.values[cells] == solution[cells]).all())
+
+	def test_count_solutions(self):
+		grid = SudokuGrid(3, Regioning(shape=(3, 3)))
+		solution = pattern(3, 3).ravel()
+		order = random.default_rng(2).permutation(grid.count)
+		grid.values[order[:300]] = solution[order[:300]]
+		grid.given[order[:300]] = True
+		self.assertEqual(grid.count_solutions().count, 1)
+		solver = grid.solver
+		grid.cells[0, 0, 0].set_given('')
+		grid.cells[0, 0, 1].set_given(int(solution[1]))
+		self.assertEqual(grid.count_solutions(limit=1), (1, 0, False))
+		self.assertIs(grid.solver, solver)
+		grid.cells[0, 0, 1].set_given(int(solution[0]))
+		self.assertEqual(grid.count_solutions().count, 0)
+
+	def test_contradiction(self):
+		grid = SudokuGrid(2, Regioning(shape=(3, 3)))
+		grid.cells[0, 0].set_given(5)
+		grid.cells[0, 8].set_given(5)
+		self.assertFalse(Solver(grid).solve())
+
+
+class TestExactCover(unittest.TestCase):
+
+	def test_count(self):
+		self.assertEqual(ExactCover(SudokuGrid(2, Regioning(shape=(2, 2)))).count(), 288)
+		self.assertEqual(ExactCover(SudokuGrid(2, Regioning(shape=(2, 2)))).count(limit=2), 2)
+
+	def test_budget(self):
+		cover = ExactCover(SudokuGrid(3, Regioning(shape=(2, 2))))
+		budget = Budget(nodes=10)
+		cover.count(budget=budget)
+		self.assertTrue(budget.exhausted)
+		self.assertEqual(cover.nodes, 10)
+		self.assertEqual(len(cover.columns), 64 + 3 * 16 * 4 + 3 * 16 * 4)
+
+	def test_blank(self):
+		grid = SudokuGrid(3, Regioning(shape=(3, 3)))
+		budget = Budget(seconds=10)
+		self.assertTrue(ExactCover(grid).solve(budget))
+		self.assertFalse(budget.exhausted)
+		self.assertTrue(solved(grid))
+
+	def test_blank_4d(self):
+		grid = SudokuGrid(4, Regioning(shape=(3, 3)))
+		budget = Budget(seconds=20)
+		self.assertTrue(ExactCover(grid).solve(budget))
+		self.assertFalse(budget.exhausted)
+		self.assertTrue(solved(grid))
+
+	def test_solve(self):
+		grid = SudokuGrid(3, Regioning(shape=(3, 3)))
+		solution = pattern(3, 3).ravel()
+		givens = random.default_rng(1).random(grid.count) < 0.3
+		grid.values[givens] = solution[givens]
+		grid.given[givens] = True
+		cover = ExactCover(grid)
+		self.assertTrue(cover.solve())
+		self.assertTrue(solved(grid))
+
+
+class TestParallelSearch(unittest.TestCase):
+
+	def test_count(self):
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		self.assertEqual(ParallelSearch(grid, depth=2, workers=2).count(), 768)
+		self.assertEqual(ParallelSearch(grid, workers=2).count(limit=5), 5)
+
+	def test_solve(self):
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		self.assertTrue(ParallelSearch(grid, workers=2).solve())
+		self.assertTrue(solved(grid))
+
+	def test_blank(self):
+		# the existence question for a blank 9^3 grid, answered well inside the bound
+		grid = SudokuGrid(3, Regioning(shape=(3, 3)))
+		search = ParallelSearch(grid, workers=2, seconds=30)
+		start = perf_counter()
+		self.assertTrue(search.solve())
+		self.assertLess(perf_counter() - start, 30)
+		self.assertFalse(search.exhausted)
+		self.assertTrue(solved(grid))
+
+	def test_seconds(self):
+		# a search cut short says so instead of claiming there are no more solutions
+		search = ParallelSearch(SudokuGrid(3, Regioning(shape=(2, 2))), workers=2, seconds=0)
+		self.assertLess(search.count(), 768)
+		self.assertTrue(search.exhausted)
+
+
+class TestPuzzleGenerator(unittest.TestCase):
+
+	def test_pattern(self):
+		for dimensions, box in [(3, 2), (4, 3), (3, 5)]:
+			grid = SudokuGrid(dimensions, Regioning(shape=(box, box)))
+			grid.values[:] = pattern(dimensions, box).ravel()
+			self.assertTrue(solved(grid))
+		self.assertIsNone(pattern(4, 2))
+
+	def test_generate(self):
+		grid = SudokuGrid(3, Regioning(shape=(2, 2)))
+		generator = PuzzleGenerator(grid, seed=0)
+		progress = list(generator.generate())
+		self.assertEqual(progress[-1].givens, grid.given.sum())
+		self.assertTrue((grid.values[grid.given] == generator.solution[grid.given]).all())
+		self.assertEqual(grid.count_solutions().count, 1)
+
+	def test_filled_by_propagation(self):
+		# with this seed propagation fills the grid during the blind additions, leaving no open cell to pick
+		grid = SudokuGrid(2, Regioning(shape=(2, 2)))
+		progress = list(PuzzleGenerator(grid, seed=158).generate())
+		additions = [step for step in progress if step.phase == 'add']
+		self.assertGreater(additions[-1].solutions, 1)
+		self.assertEqual(grid.count_solutions().count, 1)
+
+
+if __name__ == '__main__':
+	unittest.main()
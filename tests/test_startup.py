@@ -0,0 +1,33 @@
+import sys
+import unittest
+from os import path
+from subprocess import (
+	PIPE,
+	run,
+)
+
+HEADLESS = ['grid', 'grid.sudoku', 'grid.solver', 'grid.generator', 'grid.parallel', 'grid.storage', 'batch']
+# numpy dominates this; pygame and SDL alone used to add about as much again
+IMPORT_SECONDS = 1.0
+SCRIPT = f'''
+from sys import modules
+from time import perf_counter
+start = perf_counter()
+for name in {HEADLESS!r}:
+	__import__(name)
+print(perf_counter() - start, any(name.split('.')[0] == 'pygame' for name in modules))
+'''
+
+
+class TestStartup(unittest.TestCase):
+
+	def test_headless_imports(self):
+		source = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'src')
+		result = run([sys.executable, '-c', SCRIPT], cwd=source, stdout=PIPE, check=True, text=True)
+		seconds, pygame = result.stdout.split()
+		self.assertEqual(pygame, 'False')
+		self.assertLess(float(seconds), IMPORT_SECONDS)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+from numpy import memmap
+
+from grid import Regioning
+from grid.affine import pattern
+from grid.sudoku import SudokuGrid
+from grid.storage import (
+	from_json,
+	from_text,
+	load,
+	read_plane,
+	save,
+	to_json,
+	to_text,
+)
+
+
+class TestStorage(unittest.TestCase):
+
+	def setUp(self):
+		self.grid = SudokuGrid(3, Regioning(False, (3, 3)))
+		self.grid.values[:] = pattern(3, 3).ravel()
+		self.grid.given[::7] = True
+		self.grid.cells[1, 2, 3].candidates = 0b1010
+		self.grid.cells[4, 5, 6].contingencies = 0b110
+		self.grid.cells[7, 8, 0].color = 3
+		self.directory = TemporaryDirectory()
+		self.file = path.join(self.directory.name, 'puzzle.hdpp')
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def assertSameGrid(self, grid: SudokuGrid):
+		self.assertEqual(grid.shape, self.grid.shape)
+		self.assertEqual(grid.regioning.shape, self.grid.regioning.shape)
+		self.assertEqual(grid.regioning.regular, self.grid.regioning.regular)
+		for name in SudokuGrid.fields:
+			self.assertTrue((getattr(grid, name) == getattr(self.grid, name)).all(), name)
+
+	def test_binary(self):
+		save(self.grid, self.file)
+		grid = load(self.file)
+		for name in SudokuGrid.fields:
+			self.assertIsInstance(getattr(grid, name), memmap, name)
+		self.assertSameGrid(grid)
+		self.assertSameGrid(load(self.file, None))
+		grid.cells[0, 0, 1].clear()
+		self.assertEqual(grid.cells[0, 0, 1].value, '')
+		self.assertSameGrid(load(self.file))
+
+	def test_plane(self):
+		save(self.grid, self.file)
+		plane = read_plane(self.file, (2, -1, -1))
+		self.assertTrue((plane == self.grid.field('values')[2]).all())
+		self.assertEqual(read_plane(self.file, (-1, 5, -1), 'contingencies')[4, 6], 0b110)
+		self.assertRaises(ValueError, read_plane, self.file, (-1, 0, 0))
+
+	def test_json(self):
+		self.assertSameGrid(from_json(to_json(self.grid)))
+
+	def test_text(self):
+		text = to_text(self.grid)
+		self.assertEqual(text, '3 3x3 ' + ''.join(str(v) for v in self.grid.values))
+		grid = from_text(text)
+		self.assertTrue((grid.values == self.grid.values).all())
+		self.assertTrue(grid.given.all())
+		self.assertRaises(ValueError, from_text, '3 3x3 12.')
+
+
+if __name__ == '__main__':
+	unittest.main()